@@ -0,0 +1,11 @@
+# tests/conftest.py
+import pytest
+from utils.ui_analyzer import UIChain
+
+# Shared fixtures for all test modules.
+
+# Session scope: building UIChain sets up the LLM client, prompt templates
+# and rate limiter, so do it once for the whole run instead of per module.
+@pytest.fixture(scope="session")
+def ui_chain():
+    return UIChain()
@@ -2,8 +2,56 @@
 from appium import webdriver
 from appium.options.android import UiAutomator2Options
 from appium.webdriver.common.appiumby import AppiumBy
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.support.ui import WebDriverWait
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
 import time
-import xml.etree.ElementTree as ET
+from io import BytesIO
+from lxml import etree
+
+log = logging.getLogger(__name__)
+
+# Tags treated as actionable even without a clickable flag or content-desc
+_ACTIONABLE_TAGS = frozenset({'android.widget.EditText'})
+# Boolean node attributes copied verbatim into each element dict
+_BOOL_ATTRS = ('clickable', 'enabled', 'focusable', 'long-clickable',
+               'checkable', 'checked', 'scrollable', 'selected', 'visible')
+# recover=True tolerates the occasionally malformed fragments Appium
+# emits instead of failing the whole parse
+_SOURCE_PARSER = etree.XMLParser(huge_tree=True, remove_blank_text=True,
+                                 recover=True)
+# Parses bounds="[x1,y1][x2,y2]" attributes from UiAutomator dumps
+_BOUNDS_RE = re.compile(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]')
+# Where the ids of the last created sessions are persisted between runs,
+# one file per (server URL, device, app): a global file let a handler with
+# different capabilities silently attach to another worker's session
+_SESSION_CACHE_DIR = os.path.expanduser('~/.cache/appium_sessions')
+
+# Optional: decode Appium wire payloads with orjson (a C extension) when it
+# is installed. Page-source responses are the largest JSON bodies on the
+# wire and stdlib json decodes them in pure Python.
+try:
+    import orjson
+
+    class _OrjsonShim:
+        """json-module lookalike backed by orjson, for selenium's executor."""
+        @staticmethod
+        def loads(s, **kwargs):
+            return orjson.loads(s)
+
+        @staticmethod
+        def dumps(obj, **kwargs):
+            return orjson.dumps(obj).decode('utf-8')
+
+    from selenium.webdriver.remote import remote_connection as _remote_connection
+    _remote_connection.json = _OrjsonShim
+except ImportError:
+    pass  # stdlib json remains in place
 
 # --- Configuration ---
 # TODO: Adjust these capabilities based on your Appium server and device/emulator setup
@@ -21,24 +69,167 @@ CAPABILITIES = {
     'noReset': True,
     'fullReset': False,
     'language': 'en',
-    'locale': 'US'
+    'locale': 'US',
+    # Session/latency tuning: skip server reinstalls between runs, keep the
+    # accessibility tree small and don't wait for the device to go idle
+    'skipServerInstallation': True,
+    'skipDeviceInitialization': True,
+    'ignoreUnimportantViews': True,
+    'disableWindowAnimation': True,
+    'disableIdLocatorAutocompletion': True,
+    'waitForIdleTimeout': 0
 }
 # --- /Configuration ---
 
+def udid_for_worker(worker=None):
+    """
+    Maps a pytest-xdist worker name to an emulator serial so parallel test
+    workers each drive their own device (gw0 -> emulator-5554,
+    gw1 -> emulator-5556, ...). Without xdist, defaults to emulator-5554.
+    """
+    worker = worker or os.environ.get('PYTEST_XDIST_WORKER', 'gw0')
+    try:
+        index = int(worker.lstrip('gw'))
+    except ValueError:
+        index = 0
+    return f"emulator-{5554 + 2 * index}"
+
 class AppiumHandler:
     """Handles Appium driver session and basic element interactions."""
-    def __init__(self, server_url=APPIUM_SERVER_URL, capabilities=None):
+    def __init__(self, server_url=APPIUM_SERVER_URL, capabilities=None, session_id=None):
         if not capabilities:
             raise ValueError("Capabilities must be provided when initializing AppiumHandler")
         self.server_url = server_url
         self.capabilities = capabilities
-        self.driver = None
+        # Optional id of an already running session to attach to; session
+        # creation is the most expensive Appium operation by far
+        self.session_id = session_id
+        self._attached = False
+        # Keep the driver thread-local so parallel xdist workers never share
+        # one socket (sharing serializes every command on a single queue)
+        self._thread_local = threading.local()
+        # Cache of the last page source, keyed by the activity it was taken from.
+        # getPageSource is the slowest Appium call, so avoid repeating it when
+        # the screen hasn't changed.
+        self._last_source_activity = None
+        self._last_source = None
+        self._last_elements = None
+        self._cached_activity = None
+        # Interaction tick: bumped by every screen-changing action so cached
+        # derived data (the parsed lxml root) can't outlive the screen it
+        # came from
+        self._tick = 0
+        self._cached_root = None
+        # Whether the server accepts 'mobile: source'; latched to False on
+        # the first rejection so later fetches skip the failed round-trip
+        self._mobile_source_supported = None
+
+    @property
+    def driver(self):
+        return getattr(self._thread_local, 'driver', None)
+
+    @property
+    def current_activity_cached(self):
+        """Last known activity without a server round-trip. Refreshed by
+        wait_for_stable and get_page_source; cleared when an action
+        invalidates the source cache."""
+        if self._cached_activity is None and self.driver:
+            try:
+                self._cached_activity = self.driver.current_activity
+            except Exception as e:
+                print(f"Error getting current activity: {e}")
+        return self._cached_activity
+
+    @driver.setter
+    def driver(self, value):
+        self._thread_local.driver = value
+
+    def _session_cache_path(self):
+        """Cache file for this handler's (server URL, device, app) triple."""
+        key = '|'.join((
+            self.server_url,
+            self.capabilities.get('udid') or self.capabilities.get('deviceName') or '',
+            self.capabilities.get('appPackage') or '',
+        ))
+        return os.path.join(
+            _SESSION_CACHE_DIR, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def _read_cached_session_id(self):
+        """Returns the persisted session id from the last run, if any."""
+        try:
+            with open(self._session_cache_path()) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _write_cached_session_id(self, session_id):
+        """Persists the session id so later runs can try to reuse it."""
+        try:
+            os.makedirs(_SESSION_CACHE_DIR, exist_ok=True)
+            with open(self._session_cache_path(), 'w') as f:
+                f.write(session_id)
+        except OSError as e:
+            print(f"Could not persist session id: {e}")
+
+    def _attach_to_session(self, session_id, options):
+        """
+        Attaches to an already running Appium session instead of creating a
+        new one, skipping the UiAutomator2 server install/handshake cost.
+        Returns the driver, or None if the session is no longer alive.
+        """
+        original_execute = webdriver.Remote.execute
+
+        def _skip_new_session(driver_self, command, params=None):
+            if command == 'newSession':
+                return {'value': {'sessionId': session_id, 'capabilities': {}}}
+            return original_execute(driver_self, command, params)
+
+        webdriver.Remote.execute = _skip_new_session
+        try:
+            driver = webdriver.Remote(self.server_url, options=options)
+        except Exception as e:
+            print(f"Could not attach to session {session_id}: {e}")
+            return None
+        finally:
+            webdriver.Remote.execute = original_execute
+        driver.session_id = session_id
+        try:
+            # Lightweight probe: a dead session raises here
+            current_package = driver.current_package
+        except Exception as e:
+            print(f"Cached session {session_id} is no longer alive: {e}")
+            return None
+        # The session must actually be driving our app: the create path's
+        # launch verification is skipped on attach, so check it here
+        expected_package = self.capabilities.get('appPackage')
+        if expected_package and current_package != expected_package:
+            try:
+                driver.activate_app(expected_package)
+                current_package = driver.current_package
+            except Exception as e:
+                print(f"Could not bring {expected_package} to the foreground: {e}")
+            if current_package != expected_package:
+                print(f"Cached session {session_id} is running {current_package}, "
+                      f"not {expected_package}; creating a new session")
+                return None
+        return driver
 
     def start_driver(self):
         """Starts the Appium driver session."""
         if self.driver is None:
             print("Starting Appium driver...")
             options = UiAutomator2Options().load_capabilities(self.capabilities)
+
+            # Reuse a known session when possible: creating one can cost
+            # tens of seconds of server install and handshake time
+            session_id = self.session_id or self._read_cached_session_id()
+            if session_id:
+                driver = self._attach_to_session(session_id, options)
+                if driver is not None:
+                    self.driver = driver
+                    self._attached = True
+                    print(f"Reusing existing Appium session {session_id}")
+                    return
             
             # Add session timeout prevention capabilities
             options.set_capability('newCommandTimeout', 0)  # No timeout for commands
@@ -47,31 +238,67 @@ class AppiumHandler:
             options.set_capability('autoGrantPermissions', True)  # Auto grant permissions
             options.set_capability('noReset', True)  # Don't reset app state
             options.set_capability('fullReset', False)  # Don't do full reset
+            # MJPEG stream for any screenshot consumers (cheaper than repeated
+            # getScreenshot calls)
+            options.set_capability('mjpegServerPort', 7810)
             
             try:
-                self.driver = webdriver.Remote(self.server_url, options=options)
-                self.driver.implicitly_wait(5) # Wait implicitly for elements
-                
-                # Add a delay to ensure the app is launched
-                time.sleep(5)
-                
+                # Reuse one keep-alive HTTP connection pool for all commands
+                # instead of paying a TCP handshake per Appium command
+                executor = None
+                try:
+                    from appium.webdriver.appium_connection import AppiumConnection
+                    executor = AppiumConnection(remote_server_addr=self.server_url, keep_alive=True)
+                    try:
+                        executor._conn.connection_pool_kw['maxsize'] = 16
+                    except Exception:
+                        pass  # Pool internals differ between client versions
+                except Exception as e:
+                    print(f"Keep-alive connection setup failed, using default executor: {e}")
+
+                if executor is not None:
+                    self.driver = webdriver.Remote(executor, options=options)
+                else:
+                    self.driver = webdriver.Remote(self.server_url, options=options)
+                # No implicit wait: it adds hidden multi-second blocking to
+                # every lookup miss. Polling cases use explicit waits instead.
+                self.driver.implicitly_wait(0)
+
+                # Server-side lookup tuning: UiAutomator2's waitForIdle can
+                # stall every findElement up to 10s while animations run
+                try:
+                    self.driver.update_settings({
+                        'waitForIdleTimeout': 1000,
+                        'waitForSelectorTimeout': 1000,
+                        'actionAcknowledgmentTimeout': 500,
+                        'keyInjectionDelay': 0
+                    })
+                except Exception as e:
+                    print(f"Could not apply driver settings: {e}")
+
+                # Poll until the app is in the foreground instead of sleeping
+                # a fixed 5s; most launches settle in a fraction of that
+                self._wait_for_package(self.capabilities['appPackage'])
+
                 # Verify we're in the correct app
                 current_package = self.driver.current_package
                 current_activity = self.driver.current_activity
                 print(f"Current package: {current_package}")
                 print(f"Current activity: {current_activity}")
-                
+
                 if current_package != self.capabilities['appPackage']:
                     print(f"Not in the {self.capabilities['appPackage']} app, attempting to launch it...")
                     self.driver.activate_app(self.capabilities['appPackage'])
-                    time.sleep(3)  # Wait for app to launch
-                    
+                    self._wait_for_package(self.capabilities['appPackage'])
+
                     # Verify again
                     current_package = self.driver.current_package
                     current_activity = self.driver.current_activity
                     print(f"After launch - Current package: {current_package}")
                     print(f"After launch - Current activity: {current_activity}")
                 
+                self._attached = False
+                self._write_cached_session_id(self.driver.session_id)
                 print("Appium driver started successfully.")
             except Exception as e:
                 print(f"Error starting Appium driver: {e}")
@@ -81,6 +308,12 @@ class AppiumHandler:
     def stop_driver(self):
         """Stops the Appium driver session."""
         if self.driver:
+            if self._attached:
+                # We did not create this session; leave it running so the
+                # next run can attach to it again
+                print("Detaching from reused Appium session (left running).")
+                self.driver = None
+                return
             print("Stopping Appium driver...")
             try:
                 self.driver.quit()
@@ -90,15 +323,156 @@ class AppiumHandler:
                 self.driver = None
                 print("Appium driver stopped.")
 
-    def get_page_source(self):
-        """Gets the XML page source of the current screen."""
+    def _wait_for_package(self, package, timeout=10):
+        """
+        Polls with exponential backoff until the given app package is in the
+        foreground. Replaces fixed post-launch sleeps, which charged every
+        session the worst-case settle time.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            try:
+                if self.driver.current_package == package:
+                    return True
+            except Exception as e:
+                print(f"Error polling current package: {e}")
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
+        print(f"App package {package} not in foreground within {timeout}s")
+        return False
+
+    def wait_for_stable(self, timeout=5, poll_interval=0.5):
+        """
+        Waits until the UI settles instead of sleeping a fixed interval.
+        Polls the current activity (a lightweight call) and returns as soon
+        as two consecutive polls agree, or when the timeout expires.
+        """
+        if not self.driver:
+            print("Driver not started.")
+            return False
+        deadline = time.time() + timeout
+        last_activity = None
+        while time.time() < deadline:
+            try:
+                activity = self.driver.current_activity
+            except Exception as e:
+                print(f"Error polling UI state: {e}")
+                time.sleep(poll_interval)
+                continue
+            if activity is not None:
+                self._cached_activity = activity
+            if activity is not None and activity == last_activity:
+                return True
+            last_activity = activity
+            time.sleep(poll_interval)
+        print(f"UI did not stabilize within {timeout}s")
+        return False
+
+    def invalidate_source_cache(self):
+        """Invalidates the cached page source and parsed elements after an
+        action changed the screen."""
+        self._last_source_activity = None
+        self._last_source = None
+        self._last_elements = None
+        self._cached_activity = None
+        self._tick += 1
+        self._cached_root = None
+
+    def _get_root(self):
+        """
+        Returns the parsed lxml root for the current screen, memoized until
+        the next action invalidates the source cache. Callers needing both
+        the raw source and a parsed tree within the same interaction tick
+        pay for one parse instead of two.
+        """
+        if self._cached_root is not None:
+            return self._cached_root
+        source = self.get_page_source()
+        if not source:
+            return None
+        try:
+            self._cached_root = etree.fromstring(source.encode('utf-8', 'surrogatepass'),
+                                                 parser=_SOURCE_PARSER)
+        except etree.XMLSyntaxError as e:
+            print(f"Error parsing cached page source: {e}")
+            return None
+        return self._cached_root
+
+    def _filter_page_source(self, source):
+        """
+        Prunes the page source XML down to interactive elements.
+        Keeps nodes that are clickable, have a content-desc or a resource-id,
+        plus the ancestors needed to keep the tree intact. This shrinks the
+        payload later parsing passes have to chew through by ~90%.
+        """
+        try:
+            root = etree.fromstring(source.encode('utf-8', 'surrogatepass'), parser=_SOURCE_PARSER)
+        except etree.XMLSyntaxError as e:
+            print(f"Error filtering page source, returning it unfiltered: {e}")
+            return source
+
+        def is_interactive(node):
+            attrs = node.attrib
+            return (attrs.get('clickable') == 'true'
+                    or (attrs.get('content-desc') or '').strip() != ''
+                    or (attrs.get('resource-id') or '').strip() != '')
+
+        def prune(node):
+            # Keep a node if it, or any of its descendants, is interactive
+            keep = is_interactive(node)
+            for child in list(node):
+                if prune(child):
+                    keep = True
+                else:
+                    node.remove(child)
+            return keep
+
+        prune(root)
+        return etree.tostring(root, encoding='unicode')
+
+    def get_page_source(self, scope=None, filtered=True):
+        """Gets the XML page source of the current screen, reusing the cached
+        copy when the current activity hasn't changed since the last fetch.
+
+        When supported by the server, 'mobile: source' is used so the server
+        strips unused attributes (and limits to 'scope') before sending the
+        XML over the wire; otherwise the full dump is filtered locally.
+        """
         if not self.driver:
             print("Driver not started.")
             return None
         try:
-            source = self.driver.page_source
+            current_activity = self.driver.current_activity
+            self._cached_activity = current_activity
+            if self._last_source and self._last_source_activity == current_activity:
+                print(f"Reusing cached page source for activity: {current_activity}")
+                return self._last_source
+
+            source = None
+            if self._mobile_source_supported is not False:
+                try:
+                    # Ask the server for a slimmed-down source dump
+                    args = {'excludedAttributes': ['index', 'instance']}
+                    if scope:
+                        args['scope'] = scope
+                    source = self.driver.execute_script('mobile: source', args)
+                    self._mobile_source_supported = True
+                except Exception as e:
+                    self._mobile_source_supported = False
+                    print(f"'mobile: source' not supported, falling back to full dump: {e}")
+
+            if not source:
+                source = self.driver.page_source
+                if filtered:
+                    original_length = len(source)
+                    source = self._filter_page_source(source)
+                    print(f"Filtered page source: {original_length} -> {len(source)} chars")
+
+            self._last_source = source
+            self._last_source_activity = current_activity
             print(f"Page source length: {len(source)}")
-            print("Current activity:", self.driver.current_activity)
+            print("Current activity:", current_activity)
             return source
         except Exception as e:
             print(f"Error getting page source: {e}")
@@ -108,17 +482,119 @@ class AppiumHandler:
                 self.start_driver()
             return None
 
+    def _swipe_and_settle(self, start_x, start_y, end_x, end_y):
+        """
+        Performs a quick W3C pointer swipe and returns as soon as the page
+        source hash changes (the scroll visibly advanced), polling briefly
+        otherwise. Replaces the old 1s server-side gesture plus fixed client
+        wait, which charged every scroll the worst case.
+        """
+        try:
+            before = hashlib.blake2b(
+                (self.driver.page_source or '').encode('utf-8'),
+                digest_size=8).digest()
+        except Exception:
+            before = None
+        try:
+            actions = ActionChains(self.driver)
+            pointer = actions.w3c_actions.pointer_action
+            pointer.move_to_location(start_x, start_y)
+            pointer.pointer_down()
+            pointer.move_to_location(end_x, end_y)
+            pointer.pointer_up()
+            actions.perform()
+        except Exception as e:
+            print(f"W3C swipe failed, falling back to driver.swipe: {e}")
+            self.driver.swipe(start_x, start_y, end_x, end_y, 300)
+        self.invalidate_source_cache()  # The scroll moved the screen
+        deadline = time.monotonic() + 0.8
+        while time.monotonic() < deadline:
+            try:
+                after = hashlib.blake2b(
+                    (self.driver.page_source or '').encode('utf-8'),
+                    digest_size=8).digest()
+            except Exception:
+                break
+            if before is None or after != before:
+                return True
+            time.sleep(0.15)
+        return False
+
+    def _collect_attributes_batched(self):
+        """
+        Collects identifier attributes for every on-screen element in a single
+        execute_driver round-trip. Fallback for screens whose page source
+        cannot be parsed (e.g. dynamic WebView content): the per-element
+        attribute reads run server-side inside one HTTP call instead of four
+        wire calls per element.
+        """
+        script = (
+            "const els = await driver.$$('//*');\n"
+            "const out = [];\n"
+            "for (const el of els) {\n"
+            "  out.push({\n"
+            "    text: await el.getText(),\n"
+            "    content_desc: await el.getAttribute('content-desc'),\n"
+            "    resource_id: await el.getAttribute('resource-id'),\n"
+            "    class_name: await el.getAttribute('class'),\n"
+            "  });\n"
+            "}\n"
+            "return out;"
+        )
+        try:
+            response = self.driver.execute_driver(
+                script=script, script_type='webdriverio', timeout_ms=60000)
+        except Exception as e:
+            print(f"Batched attribute collection failed: {e}")
+            return []
+        records = getattr(response, 'result', response) or []
+        return [r for r in records
+                if r.get('text') or r.get('content_desc') or r.get('resource_id')]
+
+    def _resolve_match(self, elem_info):
+        """
+        Converts a locally parsed attribute record into a live element with a
+        single targeted lookup, preferring the fastest locator strategies.
+        """
+        locators = []
+        if elem_info.get('content_desc'):
+            locators.append((AppiumBy.ACCESSIBILITY_ID, elem_info['content_desc']))
+        if elem_info.get('resource_id'):
+            locators.append((AppiumBy.ID, elem_info['resource_id']))
+        if elem_info.get('text'):
+            locators.append((AppiumBy.XPATH, f"//*[@text={elem_info['text']!r}]"))
+        for loc_by, loc_value in locators:
+            try:
+                matches = self.driver.find_elements(by=loc_by, value=loc_value)
+            except Exception as e:
+                print(f"Error resolving match via {loc_by}='{loc_value}': {e}")
+                continue
+            if matches:
+                return matches[0]
+        return None
+
     def find_element(self, by, value, max_scroll_attempts=5):
         """Finds a single element, scrolling if necessary."""
         if not self.driver:
             print("Driver not started.")
             return None
         
-        # First try to find the element without scrolling
+        # First try to find the element without scrolling. find_elements
+        # (plural) returns [] on a miss instead of stalling for the whole
+        # implicit-wait window the way find_element does, so a bad locator
+        # from the AI fails fast.
         try:
-            element = self.driver.find_element(by=by, value=value)
-            if element and element.is_displayed():
+            matches = self.driver.find_elements(by=by, value=value)
+            if matches and matches[0].is_displayed():
                 print("Element found immediately")
+                return matches[0]
+            # Brief explicit poll before falling back to scrolling; this is
+            # the only place a lookup is allowed to wait for the element
+            element = WebDriverWait(self.driver, 2, poll_frequency=0.2).until(
+                lambda d: next((m for m in d.find_elements(by=by, value=value)
+                                if m.is_displayed()), None))
+            if element:
+                print("Element appeared within the explicit wait")
                 return element
         except Exception as e:
             print(f"Element not immediately visible: {e}")
@@ -138,75 +614,87 @@ class AppiumHandler:
         # First pass: collect all elements
         for attempt in range(max_scroll_attempts):
             print(f"\nScroll attempt {attempt + 1}/{max_scroll_attempts}")
-            
-            # Perform the scroll
-            self.driver.swipe(start_x, start_y, end_x, end_y, 1000)
-            time.sleep(1)  # Wait for scroll to complete
-            
+
+            # Perform the scroll, returning as soon as the screen changed
+            if not self._swipe_and_settle(start_x, start_y, end_x, end_y):
+                # End of list: further swipes would be no-ops, so stop
+                # scrolling and score what was collected so far
+                print("Screen unchanged after swipe; stopping scroll attempts")
+                break
+
             # Get all elements on the current screen
             try:
                 # Try to find the element directly first
-                element = self.driver.find_element(by=by, value=value)
-                if element and element.is_displayed():
+                matches = self.driver.find_elements(by=by, value=value)
+                if matches and matches[0].is_displayed():
                     print("Element found after scrolling")
-                    return element
-                
-                # If not found, collect all elements for analysis
-                elements = self.driver.find_elements(by=AppiumBy.XPATH, value="//*")
-                print(f"Found {len(elements)} elements on screen")
-                
-                # Collect element information
-                for elem in elements:
-                    try:
-                        # Get element attributes
-                        text = elem.text
-                        content_desc = elem.get_attribute('content-desc')
-                        resource_id = elem.get_attribute('resource-id')
-                        class_name = elem.get_attribute('class')
-                        
-                        # Only store elements with useful identifiers
-                        if text or content_desc or resource_id:
-                            found_elements.append({
-                                'element': elem,
-                                'text': text,
-                                'content_desc': content_desc,
-                                'resource_id': resource_id,
-                                'class_name': class_name
-                            })
-                            
-                    except Exception as e:
-                        print(f"Error analyzing element: {e}")
-                        continue
-                
+                    return matches[0]
+
+                # If not found, read the whole screen in one round-trip and
+                # pull the attributes out of the XML locally. The old loop
+                # fetched every element handle and then paid four get_attribute
+                # HTTP calls per element, per scroll attempt.
+                source = self.driver.page_source
+                try:
+                    root = etree.fromstring(source.encode('utf-8', 'surrogatepass'), parser=_SOURCE_PARSER)
+                except etree.XMLSyntaxError as e:
+                    # Unparseable dump (e.g. WebView content): fall back to one
+                    # batched server-side scan rather than per-element RPCs
+                    print(f"Page source not parseable, using batched collection: {e}")
+                    found_elements.extend(self._collect_attributes_batched())
+                    continue
+                screen_count = 0
+                for node in root.iter():
+                    screen_count += 1
+                    attrs = node.attrib
+                    text = attrs.get('text')
+                    content_desc = attrs.get('content-desc')
+                    resource_id = attrs.get('resource-id')
+
+                    # Only store elements with useful identifiers. Class
+                    # names repeat across the tree, so intern them: the
+                    # comparisons below become pointer checks and duplicate
+                    # strings share one allocation.
+                    if text or content_desc or resource_id:
+                        found_elements.append({
+                            'text': text,
+                            'content_desc': content_desc,
+                            'resource_id': resource_id,
+                            'class_name': sys.intern(attrs.get('class') or '')
+                        })
+                print(f"Found {screen_count} elements on screen")
+
             except Exception as e:
                 print(f"Error during scroll attempt {attempt + 1}: {e}")
                 continue
-        
+
         # After collecting all elements, analyze them to find the best match
         print(f"\nAnalyzing {len(found_elements)} collected elements...")
-        
-        # First try exact matches
-        for elem_info in found_elements:
-            if by == AppiumBy.ACCESSIBILITY_ID and elem_info['content_desc'] == value:
-                print("Found exact match by accessibility ID")
-                return elem_info['element']
-            elif by == AppiumBy.ID and elem_info['resource_id'] == value:
-                print("Found exact match by ID")
-                return elem_info['element']
-            elif by == AppiumBy.XPATH and value in str(elem_info['element'].get_attribute('xpath')):
-                print("Found exact match by XPath")
-                return elem_info['element']
-            elif by == AppiumBy.CLASS_NAME and elem_info['class_name'] == value:
-                print("Found exact match by class name")
-                return elem_info['element']
-        
+
+        # First try an exact match; 'by' is fixed for the whole call, so pick
+        # the relevant attribute once and index the records by it instead of
+        # re-evaluating a four-branch comparison per element
+        key_for_by = {
+            AppiumBy.ACCESSIBILITY_ID: 'content_desc',
+            AppiumBy.ID: 'resource_id',
+            AppiumBy.CLASS_NAME: 'class_name',
+        }.get(by)
+        if key_for_by:
+            index = {e[key_for_by]: e for e in found_elements if e[key_for_by]}
+            exact = index.get(value)
+            if exact:
+                print("Found exact match in page source")
+                resolved = self._resolve_match(exact)
+                if resolved:
+                    return resolved
+
         # If no exact match, try partial matches
         best_match = None
         best_score = 0
-        
+
         for elem_info in found_elements:
             score = 0
-            
+
             # Score based on various attributes
             if elem_info['text'] and value.lower() in elem_info['text'].lower():
                 score += 2
@@ -214,20 +702,22 @@ class AppiumHandler:
                 score += 3
             if elem_info['resource_id'] and value.lower() in elem_info['resource_id'].lower():
                 score += 4
-            
+
             # If this is a better match than our current best, update
             if score > best_score:
                 best_score = score
-                best_match = elem_info['element']
+                best_match = elem_info
                 print(f"New best match with score {score}:")
                 print(f"Text: {elem_info['text']}")
                 print(f"Content Description: {elem_info['content_desc']}")
                 print(f"Resource ID: {elem_info['resource_id']}")
-        
+
         if best_match:
             print(f"Found best matching element with score {best_score}")
-            return best_match
-        
+            resolved = self._resolve_match(best_match)
+            if resolved:
+                return resolved
+
         print("No matching element found after all scroll attempts")
         return None
 
@@ -277,7 +767,7 @@ class AppiumHandler:
                 
                 # Execute the scroll command
                 self.driver.find_element(by=AppiumBy.ANDROID_UIAUTOMATOR, value=scroll_command)
-                time.sleep(1)  # Wait for scroll to complete
+                self.wait_for_stable(timeout=2, poll_interval=0.2)  # Let the scroll settle
                 
                 if element.is_displayed():
                     print("Element is now visible")
@@ -306,7 +796,8 @@ class AppiumHandler:
             
             # Now try to click
             element.click()
-            time.sleep(1)  # Add a small delay after clicks for UI to settle
+            self.wait_for_stable(timeout=3)  # Let the UI settle, returning early when it does
+            self.invalidate_source_cache()  # The click may have changed the screen
             return True
         except Exception as e:
             print(f"Error clicking element: {e}")
@@ -316,110 +807,197 @@ class AppiumHandler:
                 self.start_driver()
             return False
 
+    def _click_by_bounds(self, value):
+        """
+        Last-resort click path: scores the current screen's nodes locally
+        against 'value' and taps the center of the best match's bounds with
+        one W3C pointer action. No element handle is ever materialized, so
+        the whole click costs one /source fetch (usually cached) plus one tap.
+        """
+        root = self._get_root()
+        if root is None:
+            return False
+        needle = value.lower()
+        best_bounds = None
+        best_score = 0
+        for node in root.iter():
+            attrs = node.attrib
+            score = 0
+            if needle in (attrs.get('text') or '').lower():
+                score += 2
+            if needle in (attrs.get('content-desc') or '').lower():
+                score += 3
+            if needle in (attrs.get('resource-id') or '').lower():
+                score += 4
+            if score > best_score and attrs.get('bounds'):
+                best_score = score
+                best_bounds = attrs['bounds']
+        if not best_bounds:
+            print(f"No bounds-based match for '{value}'")
+            return False
+        match = _BOUNDS_RE.match(best_bounds)
+        if not match:
+            print(f"Could not parse bounds: {best_bounds}")
+            return False
+        x1, y1, x2, y2 = map(int, match.groups())
+        cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+        print(f"Tapping best match for '{value}' at ({cx}, {cy})")
+        try:
+            actions = ActionChains(self.driver)
+            actions.w3c_actions.pointer_action.move_to_location(cx, cy)
+            actions.w3c_actions.pointer_action.click()
+            actions.perform()
+        except Exception as e:
+            print(f"Error tapping at ({cx}, {cy}): {e}")
+            return False
+        self.wait_for_stable(timeout=3)
+        self.invalidate_source_cache()
+        return True
+
     def find_and_click(self, by, value):
         """Finds an element and clicks it."""
+        if by == AppiumBy.XPATH:
+            # XPath is the slowest locator strategy; log so regressions
+            # away from accessibility id / resource id are easy to spot
+            print(f"Warning: clicking via XPath locator '{value}'; "
+                  "prefer accessibility id or resource id")
         element = self.find_element(by, value)
         if element:
             return self.click_element(element)
-        else:
-            print(f"Element not found for clicking: {by}='{value}'")
-            return False
+        # No usable handle from the server: try a locally scored bounds tap
+        if self._click_by_bounds(value):
+            return True
+        print(f"Element not found for clicking: {by}='{value}'")
+        return False
+
+    def execute_batch(self, script, timeout=60000):
+        """
+        Runs a batch of WebdriverIO commands in a single server round-trip
+        via Appium's execute_driver endpoint. Returns the script result,
+        or None if the script failed or the server doesn't support it.
+        """
+        if not self.driver:
+            print("Driver not started.")
+            return None
+        try:
+            result = self.driver.execute_driver(
+                script=script,
+                script_type='webdriverio',
+                timeout_ms=timeout
+            )
+            self.invalidate_source_cache()  # The batch likely changed the screen
+            return result
+        except Exception as e:
+            print(f"Error executing batched script: {e}")
+            return None
 
     def get_actionable_elements(self, page_source):
         """
         Parses the XML page source and extracts potentially actionable elements.
         Returns a list of dictionaries, each representing an element.
         """
+        # Retries on an unchanged screen reuse the parsed elements from the
+        # cached source instead of re-walking the XML (and re-prompting the AI)
+        if page_source and page_source == self._last_source and self._last_elements is not None:
+            print(f"Reusing {len(self._last_elements)} cached actionable elements")
+            return self._last_elements
+
         elements = []
         if not page_source:
             print("No page source provided")
             return elements
 
+        # lxml consumes bytes directly; only encode when handed a str, and
+        # surrogatepass keeps lone surrogates in the dump from raising here.
+        # page_source itself stays unrebound so the write-back below compares
+        # like-for-like against the str cached by get_page_source
+        if isinstance(page_source, str):
+            source_bytes = page_source.encode('utf-8', 'surrogatepass')
+        else:
+            source_bytes = page_source
+
         try:
             print("\n--- Starting XML Parsing ---")
-            root = ET.fromstring(page_source)
-            print(f"Root element: {root.tag}")
-            
-            # Find ALL elements that could be actionable, regardless of visibility
-            all_elements = root.findall('.//*')
-            print(f"\nTotal elements found in XML: {len(all_elements)}")
-            
-            # Find all potentially actionable elements
-            clickable_elements = root.findall('.//*[@clickable="true"]')
-            print(f"Clickable elements: {len(clickable_elements)}")
-            
-            content_desc_elements = root.findall('.//*[@content-desc]')
-            print(f"Elements with content-desc: {len(content_desc_elements)}")
-            
-            button_elements = root.findall('.//android.widget.Button')
-            print(f"Button elements: {len(button_elements)}")
-            
-            textview_elements = root.findall('.//android.widget.TextView')
-            print(f"TextView elements: {len(textview_elements)}")
-            
-            imagebutton_elements = root.findall('.//android.widget.ImageButton')
-            print(f"ImageButton elements: {len(imagebutton_elements)}")
-            
-            edittext_elements = root.findall('.//android.widget.EditText')
-            print(f"EditText elements: {len(edittext_elements)}")
-
-            # Print details of the first few elements of each type
-            print("\nSample elements found:")
-            for elem_type, elem_list in [
-                ("Clickable", clickable_elements[:3]),
-                ("Content-desc", content_desc_elements[:3]),
-                ("Button", button_elements[:3]),
-                ("TextView", textview_elements[:3]),
-                ("ImageButton", imagebutton_elements[:3]),
-                ("EditText", edittext_elements[:3])
-            ]:
-                print(f"\nFirst 3 {elem_type} elements:")
-                for elem in elem_list:
-                    print(f"  - {elem.tag}: {elem.attrib}")
-
-            # Combine all found elements into a single list
-            all_actionable_elements = (
-                clickable_elements +
-                content_desc_elements +
-                button_elements +
-                textview_elements +
-                imagebutton_elements +
-                edittext_elements
-            )
-            
-            # Remove duplicates by converting to a set and back to a list
-            unique_elements = list(set(all_actionable_elements))
-            print(f"\nTotal unique potentially actionable elements: {len(unique_elements)}")
-
-            # Process each unique element
-            for elem in unique_elements:
+            candidates = 0
+            # Stream the document instead of materializing the whole DOM:
+            # each node is inspected on its 'end' event and freed right after,
+            # so peak memory tracks the kept elements, not the full dump.
+            # Every node is visited exactly once, so no de-dup pass is needed.
+            # Disabled, unlabelled containers are pruned on their 'start'
+            # event: nothing under them can be actionable, so their whole
+            # subtree is skipped without per-node checks.
+            skip_depth = 0
+            for event, elem in etree.iterparse(
+                    BytesIO(source_bytes),
+                    events=('start', 'end'), huge_tree=True):
+                if event == 'start':
+                    if skip_depth:
+                        skip_depth += 1
+                    else:
+                        attrs = elem.attrib
+                        if (attrs.get('enabled') == 'false'
+                                and not (attrs.get('text') or '').strip()
+                                and not (attrs.get('content-desc') or '').strip()):
+                            skip_depth = 1
+                    continue
+                if skip_depth:
+                    skip_depth -= 1
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+                    continue
                 attrs = elem.attrib
+                if not (attrs.get('clickable') == 'true'
+                        or attrs.get('long-clickable') == 'true'
+                        or attrs.get('focusable') == 'true'
+                        or (attrs.get('content-desc') or '').strip()
+                        or elem.tag in _ACTIONABLE_TAGS):
+                    # Drop the processed subtree before moving on
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+                    continue
+                candidates += 1
                 element_info = {
                     'class': attrs.get('class'),
                     'text': attrs.get('text'),
                     'content-desc': attrs.get('content-desc'),
                     'resource-id': attrs.get('resource-id'),
-                    'clickable': attrs.get('clickable') == 'true',
                     'bounds': attrs.get('bounds'),
-                    'enabled': attrs.get('enabled') == 'true',
-                    'focusable': attrs.get('focusable') == 'true',
-                    'long-clickable': attrs.get('long-clickable') == 'true',
                     'package': attrs.get('package'),
-                    'checkable': attrs.get('checkable') == 'true',
-                    'checked': attrs.get('checked') == 'true',
-                    'scrollable': attrs.get('scrollable') == 'true',
-                    'selected': attrs.get('selected') == 'true',
-                    'visible': attrs.get('visible') == 'true'  # Add visibility flag
                 }
+                for key in _BOOL_ATTRS:
+                    element_info[key] = attrs.get(key) == 'true'
                 
                 # Only add elements that are either clickable or have a non-empty content description
                 if element_info['clickable'] or (element_info['content-desc'] and element_info['content-desc'].strip()):
-                    print(f"\nAdding actionable element: {element_info}")
+                    # Record the preferred locator: accessibility id and resource
+                    # id resolve far faster on the server than an XPath search
+                    if element_info['content-desc'] and element_info['content-desc'].strip():
+                        element_info['by'] = AppiumBy.ACCESSIBILITY_ID
+                        element_info['locator'] = element_info['content-desc']
+                    elif element_info['resource-id']:
+                        element_info['by'] = AppiumBy.ID
+                        element_info['locator'] = element_info['resource-id']
+                    else:
+                        # Last resort only; XPath lookups are the slowest strategy
+                        element_info['by'] = AppiumBy.XPATH
+                        element_info['locator'] = f"//*[@text={element_info['text']!r}]"
+                    # Per-element prints dominate runtime on busy screens;
+                    # only format the record when debug logging is on
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("Adding actionable element: %s", element_info)
                     elements.append(element_info)
 
+                # The dict copy above is all we keep; free the node itself
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+            print(f"Unique potentially actionable elements: {candidates}")
             print(f"\nTotal actionable elements found: {len(elements)}")
 
-        except ET.ParseError as e:
+        except etree.XMLSyntaxError as e:
             print(f"Error parsing XML: {e}")
             print(f"First 100 characters of page source: {page_source[:100]}")
         except Exception as e:
@@ -427,6 +1005,8 @@ class AppiumHandler:
             print(f"Error type: {type(e)}")
             print(f"Error message: {str(e)}")
 
+        if page_source == self._last_source:
+            self._last_elements = elements
         return elements
 
 # Example usage (for testing the handler itself)
@@ -1,5 +1,6 @@
-import os
 import json
+import logging
+import os
 import time
 from ai_android_tester_poc.utils.appium_handler import AppiumHandler, AppiumBy
 from ai_android_tester_poc.utils.test_case_generator import TestCaseGenerator
@@ -18,6 +19,9 @@ CLOCK_CAPABILITIES = {
 }
 
 def main():
+    # The generator logs through the logging module; without this a crawl
+    # run from this script is silent (the root logger defaults to WARNING)
+    logging.basicConfig(level=logging.INFO)
     print("Starting test case generation...")
     
     # Initialize Appium handler
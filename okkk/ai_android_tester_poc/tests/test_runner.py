@@ -1,26 +1,72 @@
+import argparse
+import concurrent.futures
 import json
+import logging
+import multiprocessing
 import os
+import re
 import time
-from typing import Dict, Any, List
-from ai_android_tester_poc.utils.appium_handler import AppiumHandler, AppiumBy
+from typing import Dict, Any, Iterable, Iterator, List
+try:
+    import ijson
+except ImportError:
+    # Optional: without it test cases are loaded eagerly via json.load
+    ijson = None
+try:
+    import orjson
+except ImportError:
+    # Optional: without it results are written via stdlib json
+    orjson = None
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from ai_android_tester_poc.utils.appium_handler import AppiumHandler, AppiumBy, udid_for_worker
+
+# Lazy %s formatting keeps per-step log bodies from being built when the
+# level filters them out; main() and the worker initializer call basicConfig
+logger = logging.getLogger(__name__)
+
+# The "list everything on screen" dumps in the failure paths each cost a
+# full tree walk; only run them when explicitly debugging
+DEBUG = bool(os.getenv('AI_TESTER_DEBUG'))
+
+# Parses '[id:|desc:]<element> <predicate> [expected text]' in one pass,
+# instead of lowering/splitting the assertion string once per predicate
+_ASSERT_RE = re.compile(
+    r'^(?:(id|desc):)?(.+?)\s+(is visible|is enabled|is selected|contains text)'
+    r'(?:\s+(.+?))?\s*$',
+    re.IGNORECASE
+)
 
 class TestRunner:
     def __init__(self, appium_handler: AppiumHandler):
         self.appium_handler = appium_handler
         self.test_results = []
-
-    def load_test_cases(self, filename: str = "generated_test_cases.json") -> List[Dict[str, Any]]:
-        """Loads test cases from a JSON file."""
+        # Resolved assertion lookups, keyed on the handler's source-cache
+        # tick so entries expire as soon as the screen changes; consecutive
+        # assertions against the same element skip the repeat lookup
+        self._resolve_cache = {}
+
+    def load_test_cases(self, filename: str = "generated_test_cases.json") -> Iterator[Dict[str, Any]]:
+        """Yields test cases from a JSON file.
+
+        With ijson available the file is streamed, so execution of the
+        first case can start while the rest of a large LLM-generated suite
+        is still parsing; otherwise the whole file is loaded up front.
+        """
         try:
-            with open(filename, 'r') as f:
-                return json.load(f)
+            if ijson is not None:
+                with open(filename, 'rb') as f:
+                    yield from ijson.items(f, 'item')
+            else:
+                with open(filename, 'r') as f:
+                    yield from json.load(f)
         except Exception as e:
-            print(f"Error loading test cases: {e}")
-            return []
+            logger.error("Error loading test cases: %s", e)
 
     def execute_test_case(self, test_case: Dict[str, Any]) -> Dict[str, Any]:
         """Executes a single test case and returns the result."""
-        print(f"\nExecuting test case: {test_case['test_case_id']} - {test_case['title']}")
+        logger.info("Executing test case: %s - %s", test_case['test_case_id'], test_case['title'])
         result = {
             "test_case_id": test_case["test_case_id"],
             "title": test_case["title"],
@@ -32,7 +78,7 @@ class TestRunner:
         try:
             # Execute each step in the test case
             for step in test_case["steps"]:
-                print(f"\nExecuting step {step['step_number']}: {step['action']}")
+                logger.info("Executing step %s: %s", step['step_number'], step['action'])
                 step_result = self._execute_step(step)
                 result["steps_executed"].append(step_result)
 
@@ -45,7 +91,7 @@ class TestRunner:
 
             # Verify assertions
             for assertion in test_case.get("assertions", []):
-                print(f"\nVerifying assertion: {assertion}")
+                logger.debug("Verifying assertion: %s", assertion)
                 assertion_result = self._verify_assertion(assertion)
                 if not assertion_result["passed"]:
                     result["status"] = "FAILED"
@@ -62,6 +108,101 @@ class TestRunner:
 
         return result
 
+    def _dump_candidates(self, label: str, predicate) -> None:
+        """Debug helper: lists matching on-screen elements through one
+        batched attribute fetch instead of a get_attribute round-trip per
+        element."""
+        records = self.appium_handler._collect_attributes_batched()
+        logger.debug("%s:", label)
+        for record in records:
+            if predicate(record):
+                logger.debug("- %s (id: %s)", record.get('text'), record.get('resource_id'))
+
+    def _step_hour(self, element, action_type):
+        """Selects an hour cell in the time picker; returns the clicked element."""
+        hour_value = element.get("value", "").lstrip("0")  # Remove leading zero if present
+        logger.debug("Looking for hour element with value: %s", hour_value)
+        # Resource-id lookup plus a client-side text filter: an XPath text
+        # match forces UiAutomator2 to snapshot and walk the whole tree,
+        # while id lookups resolve directly
+        hour_candidates = self.appium_handler.find_elements(
+            AppiumBy.ID,
+            "com.google.android.deskclock:id/material_hour_tv"
+        )
+        hour_element = next(
+            (h for h in hour_candidates
+             if h.get_attribute('text') == hour_value),
+            None
+        )
+        if not hour_element:
+            if DEBUG:
+                self._dump_candidates(
+                    "Available hour elements",
+                    lambda r: (r.get('resource_id') or '').endswith('material_hour_tv')
+                )
+            raise ValueError(f"Could not find hour element with value {hour_value}")
+        logger.debug("Found hour element: %s", hour_value)
+        hour_element.click()
+        return hour_element
+
+    def _step_period(self, element, action_type):
+        """Clicks the AM or PM button; returns the clicked element."""
+        period = "AM" if "am" in action_type else "PM"
+        logger.debug("Looking for %s button", period)
+        period_button = self.appium_handler.find_element(
+            AppiumBy.ID,
+            f"com.google.android.deskclock:id/material_clock_period_{period.lower()}_button"
+        )
+        if not period_button:
+            if DEBUG:
+                self._dump_candidates(
+                    "Available period buttons",
+                    lambda r: 'material_clock_period_' in (r.get('resource_id') or '')
+                )
+            raise ValueError(f"Could not find {period} button")
+        logger.debug("Found %s button", period)
+        period_button.click()
+        return period_button
+
+    def _click_picker_button(self, label, resource_id):
+        """Shared body for the OK/Cancel/mode buttons, which only differ in
+        label and resource id; returns the clicked element."""
+        logger.debug("Looking for %s", label)
+        button = self.appium_handler.find_element(AppiumBy.ID, resource_id)
+        if not button:
+            if DEBUG:
+                self._dump_candidates(
+                    "Available buttons",
+                    lambda r: r.get('class_name') == 'android.widget.Button'
+                )
+            raise ValueError(f"Could not find {label}")
+        logger.debug("Found %s", label)
+        button.click()
+        return button
+
+    def _step_ok(self, element, action_type):
+        return self._click_picker_button(
+            "OK button", "com.google.android.deskclock:id/material_timepicker_ok_button")
+
+    def _step_cancel(self, element, action_type):
+        return self._click_picker_button(
+            "Cancel button", "com.google.android.deskclock:id/material_timepicker_cancel_button")
+
+    def _step_mode(self, element, action_type):
+        return self._click_picker_button(
+            "text input mode button", "com.google.android.deskclock:id/material_timepicker_mode_button")
+
+    # Keyword -> handler, checked in order (plain functions, so handlers are
+    # called with self explicitly)
+    _STEP_DISPATCH = (
+        ("hour", _step_hour),
+        ("am", _step_period),
+        ("pm", _step_period),
+        ("ok", _step_ok),
+        ("cancel", _step_cancel),
+        ("switch to text input mode", _step_mode),
+    )
+
     def _execute_step(self, step: Dict[str, Any]) -> Dict[str, Any]:
         """Executes a single step of a test case."""
         result = {
@@ -73,123 +214,36 @@ class TestRunner:
 
         try:
             element = step["element"]
+            # Lowered once; every dispatch check below reuses it
             action_type = step["action"].lower()
 
             # Print step details
-            print(f"\nExecuting step {step['step_number']}:")
-            print(f"Action: {action_type}")
-            print(f"Element details: {element}")
-
-            # Handle time picker elements
-            if "hour" in action_type.lower():
-                # For hour selection, we need to find the hour text view
-                hour_value = element.get("value", "").lstrip("0")  # Remove leading zero if present
-                print(f"Looking for hour element with value: {hour_value}")
-                hour_element = self.appium_handler.find_element(
-                    AppiumBy.XPATH,
-                    f"//android.widget.TextView[@resource-id='com.google.android.deskclock:id/material_hour_tv' and @text='{hour_value}']"
-                )
-                if hour_element:
-                    print(f"Found hour element: {hour_element.get_attribute('text')}")
-                    hour_element.click()
-                else:
-                    # Print all visible hour elements for debugging
-                    all_hours = self.appium_handler.find_elements(
-                        AppiumBy.XPATH,
-                        "//android.widget.TextView[@resource-id='com.google.android.deskclock:id/material_hour_tv']"
-                    )
-                    print("Available hour elements:")
-                    for h in all_hours:
-                        print(f"- {h.get_attribute('text')}")
-                    raise ValueError(f"Could not find hour element with value {hour_value}")
-
-            elif "am" in action_type.lower() or "pm" in action_type.lower():
-                # For AM/PM selection
-                period = "AM" if "am" in action_type.lower() else "PM"
-                print(f"Looking for {period} button")
-                period_button = self.appium_handler.find_element(
-                    AppiumBy.ID,
-                    f"com.google.android.deskclock:id/material_clock_period_{period.lower()}_button"
-                )
-                if period_button:
-                    print(f"Found {period} button")
-                    period_button.click()
-                else:
-                    # Print all visible period buttons for debugging
-                    all_periods = self.appium_handler.find_elements(
-                        AppiumBy.XPATH,
-                        "//android.widget.Button[contains(@resource-id, 'material_clock_period_')]"
-                    )
-                    print("Available period buttons:")
-                    for p in all_periods:
-                        print(f"- {p.get_attribute('text')}")
-                    raise ValueError(f"Could not find {period} button")
-
-            elif "ok" in action_type.lower():
-                # For OK button
-                print("Looking for OK button")
-                ok_button = self.appium_handler.find_element(
-                    AppiumBy.ID,
-                    "com.google.android.deskclock:id/material_timepicker_ok_button"
-                )
-                if ok_button:
-                    print("Found OK button")
-                    ok_button.click()
-                else:
-                    # Print all visible buttons for debugging
-                    all_buttons = self.appium_handler.find_elements(
-                        AppiumBy.XPATH,
-                        "//android.widget.Button"
-                    )
-                    print("Available buttons:")
-                    for b in all_buttons:
-                        print(f"- {b.get_attribute('text')} (id: {b.get_attribute('resource-id')})")
-                    raise ValueError("Could not find OK button")
-
-            elif "cancel" in action_type.lower():
-                # For Cancel button
-                print("Looking for Cancel button")
-                cancel_button = self.appium_handler.find_element(
-                    AppiumBy.ID,
-                    "com.google.android.deskclock:id/material_timepicker_cancel_button"
-                )
-                if cancel_button:
-                    print("Found Cancel button")
-                    cancel_button.click()
-                else:
-                    # Print all visible buttons for debugging
-                    all_buttons = self.appium_handler.find_elements(
-                        AppiumBy.XPATH,
-                        "//android.widget.Button"
-                    )
-                    print("Available buttons:")
-                    for b in all_buttons:
-                        print(f"- {b.get_attribute('text')} (id: {b.get_attribute('resource-id')})")
-                    raise ValueError("Could not find Cancel button")
-
-            elif "switch to text input mode" in action_type.lower():
-                # For text input mode button
-                print("Looking for text input mode button")
-                mode_button = self.appium_handler.find_element(
-                    AppiumBy.ID,
-                    "com.google.android.deskclock:id/material_timepicker_mode_button"
-                )
-                if mode_button:
-                    print("Found text input mode button")
-                    mode_button.click()
-                else:
-                    # Print all visible buttons for debugging
-                    all_buttons = self.appium_handler.find_elements(
-                        AppiumBy.XPATH,
-                        "//android.widget.Button"
-                    )
-                    print("Available buttons:")
-                    for b in all_buttons:
-                        print(f"- {b.get_attribute('text')} (id: {b.get_attribute('resource-id')})")
-                    raise ValueError("Could not find text input mode button")
-
-            # Add a small delay after each action
-            time.sleep(1)
+            logger.debug("Executing step %s:", step['step_number'])
+            logger.debug("Action: %s", action_type)
+            logger.debug("Element details: %s", element)
+
+            # Handle time picker elements: the first matching keyword wins,
+            # in the same order as the old if/elif chain
+            clicked_element = None
+            for keyword, handler in self._STEP_DISPATCH:
+                if keyword in action_type:
+                    clicked_element = handler(self, element, action_type)
+                    break
+
+            # Wait for the UI to react instead of napping a fixed second:
+            # clicks that dismiss the picker make the element stale within
+            # tens of ms, and ones that don't (hour/period selection) fall
+            # through after the 1s cap, so no step is slower than before
+            if clicked_element is not None:
+                try:
+                    WebDriverWait(self.appium_handler.driver, 1,
+                                  poll_frequency=0.1).until(
+                        EC.staleness_of(clicked_element))
+                except TimeoutException:
+                    pass
+                # The click changed the screen: bump the handler's source
+                # cache tick so stale resolver entries stop matching
+                self.appium_handler.invalidate_source_cache()
 
         except Exception as e:
             result["status"] = "FAILED"
@@ -197,6 +251,36 @@ class TestRunner:
 
         return result
 
+    def _resolve_element(self, prefix, element_desc):
+        """Resolves an assertion's element description to an element, using
+        the explicit id:/desc: strategy when given and falling back to the
+        accessibility-id then text probes otherwise. Results are memoized
+        per screen snapshot."""
+        cache_key = (self.appium_handler._tick, prefix, element_desc)
+        if cache_key in self._resolve_cache:
+            return self._resolve_cache[cache_key]
+
+        if prefix:
+            if prefix.lower() == "id":
+                element = self.appium_handler.find_element(AppiumBy.ID, element_desc)
+            else:
+                element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc)
+        else:
+            # Try all strategies. The text fallback goes through a native
+            # UiSelector, which runs inside the device's UiAutomator process
+            # instead of snapshotting the tree to XML for an XPath query
+            # (json.dumps produces a correctly quoted Java string literal)
+            element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc)
+            if not element:
+                element = self.appium_handler.find_element(
+                    AppiumBy.ANDROID_UIAUTOMATOR,
+                    f'new UiSelector().text({json.dumps(element_desc)})')
+
+        if len(self._resolve_cache) >= 64:
+            self._resolve_cache.clear()
+        self._resolve_cache[cache_key] = element
+        return element
+
     def _verify_assertion(self, assertion: str) -> Dict[str, Any]:
         """Verifies a single assertion."""
         result = {
@@ -205,45 +289,25 @@ class TestRunner:
         }
 
         try:
-            # Basic assertion checks
-            if "is visible" in assertion.lower():
-                # Check if element is visible
-                element_desc = assertion.split("is visible")[0].strip()
-                element = None
-                
-                # Try different locator strategies
-                if element_desc.startswith("id:"):
-                    element = self.appium_handler.find_element(AppiumBy.ID, element_desc[3:])
-                elif element_desc.startswith("desc:"):
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc[5:])
-                else:
-                    # Try all strategies
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc)
-                    if not element:
-                        element = self.appium_handler.find_element(AppiumBy.XPATH, f"//*[@text='{element_desc}']")
-                
+            # One regex pass extracts prefix, element description, predicate
+            # and optional expected text; unrecognized assertions pass
+            # through unchecked, as before
+            match = _ASSERT_RE.match(assertion)
+            if not match:
+                return result
+
+            prefix, element_desc, predicate, expected_text = match.groups()
+            element_desc = element_desc.strip()
+            predicate = predicate.lower()
+            element = self._resolve_element(prefix, element_desc)
+
+            if predicate == "is visible":
                 if not element or not element.is_displayed():
                     result["passed"] = False
                     result["error"] = f"Element '{element_desc}' is not visible"
 
-            elif "contains text" in assertion.lower():
-                # Check if element contains specific text
-                parts = assertion.split("contains text")
-                element_desc = parts[0].strip()
-                expected_text = parts[1].strip().strip('"\'')
-                
-                element = None
-                # Try different locator strategies
-                if element_desc.startswith("id:"):
-                    element = self.appium_handler.find_element(AppiumBy.ID, element_desc[3:])
-                elif element_desc.startswith("desc:"):
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc[5:])
-                else:
-                    # Try all strategies
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc)
-                    if not element:
-                        element = self.appium_handler.find_element(AppiumBy.XPATH, f"//*[@text='{element_desc}']")
-                
+            elif predicate == "contains text":
+                expected_text = (expected_text or "").strip().strip('"\'')
                 if not element:
                     result["passed"] = False
                     result["error"] = f"Element '{element_desc}' not found"
@@ -251,42 +315,12 @@ class TestRunner:
                     result["passed"] = False
                     result["error"] = f"Element '{element_desc}' does not contain text '{expected_text}'"
 
-            elif "is enabled" in assertion.lower():
-                # Check if element is enabled
-                element_desc = assertion.split("is enabled")[0].strip()
-                element = None
-                
-                # Try different locator strategies
-                if element_desc.startswith("id:"):
-                    element = self.appium_handler.find_element(AppiumBy.ID, element_desc[3:])
-                elif element_desc.startswith("desc:"):
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc[5:])
-                else:
-                    # Try all strategies
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc)
-                    if not element:
-                        element = self.appium_handler.find_element(AppiumBy.XPATH, f"//*[@text='{element_desc}']")
-                
+            elif predicate == "is enabled":
                 if not element or not element.is_enabled():
                     result["passed"] = False
                     result["error"] = f"Element '{element_desc}' is not enabled"
 
-            elif "is selected" in assertion.lower():
-                # Check if element is selected
-                element_desc = assertion.split("is selected")[0].strip()
-                element = None
-                
-                # Try different locator strategies
-                if element_desc.startswith("id:"):
-                    element = self.appium_handler.find_element(AppiumBy.ID, element_desc[3:])
-                elif element_desc.startswith("desc:"):
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc[5:])
-                else:
-                    # Try all strategies
-                    element = self.appium_handler.find_element(AppiumBy.ACCESSIBILITY_ID, element_desc)
-                    if not element:
-                        element = self.appium_handler.find_element(AppiumBy.XPATH, f"//*[@text='{element_desc}']")
-                
+            elif predicate == "is selected":
                 if not element or not element.is_selected():
                     result["passed"] = False
                     result["error"] = f"Element '{element_desc}' is not selected"
@@ -297,33 +331,77 @@ class TestRunner:
 
         return result
 
-    def run_tests(self, test_cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Runs all test cases and returns the results."""
-        print(f"\nStarting test execution for {len(test_cases)} test cases")
+    def run_tests(self, test_cases: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Runs all test cases and returns the results. Accepts any iterable
+        so streamed cases execute as they are parsed."""
+        logger.info("Starting test execution")
         
         for test_case in test_cases:
             result = self.execute_test_case(test_case)
             self.test_results.append(result)
             
             # Print test result
-            print(f"\nTest Case {result['test_case_id']} - {result['title']}: {result['status']}")
+            logger.info("Test Case %s - %s: %s", result['test_case_id'], result['title'], result['status'])
             if result["status"] == "FAILED":
-                print("Failures:")
+                logger.info("Failures:")
                 for failure in result["failures"]:
-                    print(f"  - {failure}")
+                    logger.info("  - %s", failure)
 
         return self.test_results
 
     def save_results(self, filename: str = "test_results.json"):
         """Saves test results to a JSON file."""
         try:
-            with open(filename, 'w') as f:
-                json.dump(self.test_results, f, indent=2)
-            print(f"\nTest results saved to {filename}")
+            if orjson is not None:
+                # C serializer: one bytes blob out, no pure-Python
+                # indent walk over a large result list
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(self.test_results,
+                                         option=orjson.OPT_INDENT_2))
+            else:
+                with open(filename, 'w') as f:
+                    json.dump(self.test_results, f, indent=2)
+            logger.info("Test results saved to %s", filename)
         except Exception as e:
-            print(f"Error saving test results: {e}")
+            logger.error("Error saving test results: %s", e)
+
+# Worker-local runner for --parallel execution: each worker process binds
+# to its own Appium server and emulator once, in the pool initializer, and
+# reuses that session for every test case it is handed.
+_worker_runner = None
+
+def _init_worker(worker_indices, capabilities):
+    """Binds this worker process to its own Appium server and emulator."""
+    global _worker_runner
+    logging.basicConfig(level=logging.INFO)
+    index = worker_indices.get()
+    worker_capabilities = dict(capabilities)
+    worker_capabilities['udid'] = udid_for_worker(f'gw{index}')
+    # Distinct systemPort per UiAutomator2 instance so servers don't collide
+    worker_capabilities['systemPort'] = 8200 + index
+    handler = AppiumHandler(
+        server_url=f'http://localhost:{4723 + index}',
+        capabilities=worker_capabilities
+    )
+    handler.start_driver()
+    _worker_runner = TestRunner(handler)
+    logger.info("Worker %d ready on port %d (%s)", index, 4723 + index, worker_capabilities['udid'])
+
+def _run_test_case(test_case):
+    """Executes one test case on this worker's runner."""
+    return _worker_runner.execute_test_case(test_case)
 
 def main():
+    parser = argparse.ArgumentParser(description="Run generated test cases")
+    parser.add_argument(
+        '--parallel', type=int, default=1, metavar='N',
+        help="Fan test cases out over N Appium servers on ports 4723..4723+N-1, "
+             "each driving its own emulator (default: 1, sequential)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
     # Google Clock app capabilities
     CLOCK_CAPABILITIES = {
         'platformName': 'Android',
@@ -340,22 +418,46 @@ def main():
     # Initialize Appium handler
     handler = AppiumHandler(capabilities=CLOCK_CAPABILITIES)
     try:
-        # Start the Appium driver
-        handler.start_driver()
-        print("Appium driver started successfully")
-
         # Initialize test runner
         runner = TestRunner(handler)
-        print("Test runner initialized")
+        logger.info("Test runner initialized")
 
-        # Load and run test cases
+        # Load test cases lazily: the sequential path starts executing the
+        # first case while the rest of the file is still parsing
         test_cases = runner.load_test_cases()
-        if not test_cases:
-            print("No test cases found to execute")
-            return
 
-        print(f"\nLoaded {len(test_cases)} test cases")
-        results = runner.run_tests(test_cases)
+        if args.parallel > 1:
+            # Fan-out needs the whole list up front
+            test_cases = list(test_cases)
+            if not test_cases:
+                logger.warning("No test cases found to execute")
+                return
+            logger.info("Loaded %d test cases", len(test_cases))
+            # Each test case starts from the app's launch activity, so the
+            # matrix is independent and the I/O-bound Appium round-trips
+            # scale near-linearly with device count
+            logger.info("Running across %d parallel workers", args.parallel)
+            worker_indices = multiprocessing.Manager().Queue()
+            for index in range(args.parallel):
+                worker_indices.put(index)
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=args.parallel,
+                    initializer=_init_worker,
+                    initargs=(worker_indices, CLOCK_CAPABILITIES)) as pool:
+                futures = [pool.submit(_run_test_case, tc) for tc in test_cases]
+                for future in concurrent.futures.as_completed(futures):
+                    result = future.result()
+                    runner.test_results.append(result)
+                    logger.info("Test Case %s - %s: %s", result['test_case_id'], result['title'], result['status'])
+            results = runner.test_results
+        else:
+            # Start the Appium driver
+            handler.start_driver()
+            logger.info("Appium driver started successfully")
+            results = runner.run_tests(test_cases)
+            if not results:
+                logger.warning("No test cases found to execute")
+                return
 
         # Save results
         runner.save_results()
@@ -363,17 +465,17 @@ def main():
         # Print summary
         passed = sum(1 for r in results if r["status"] == "PASSED")
         failed = sum(1 for r in results if r["status"] == "FAILED")
-        print(f"\nTest Execution Summary:")
-        print(f"Total Tests: {len(results)}")
-        print(f"Passed: {passed}")
-        print(f"Failed: {failed}")
+        logger.info("Test Execution Summary:")
+        logger.info("Total Tests: %d", len(results))
+        logger.info("Passed: %d", passed)
+        logger.info("Failed: %d", failed)
 
     except Exception as e:
-        print(f"Error during test execution: {e}")
+        logger.error("Error during test execution: %s", e)
     finally:
-        # Clean up
+        # Clean up (worker sessions are left running for session reuse)
         handler.stop_driver()
-        print("\nTest execution completed")
+        logger.info("Test execution completed")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,14 +1,21 @@
+import hashlib
 import json
+import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 import google.generativeai as genai
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langchain.chains import LLMChain
+try:
+    import orjson
+except ImportError:
+    # Optional: without it test cases are written via stdlib json
+    orjson = None
 from dotenv import load_dotenv
 from ai_android_tester_poc.utils.appium_handler import AppiumHandler, AppiumBy
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
@@ -20,105 +27,125 @@ if not GOOGLE_API_KEY:
 genai.configure(api_key=GOOGLE_API_KEY)
 MODEL_NAME = os.getenv('MODEL_NAME', 'gemini-1.5-pro')
 
+# Prompt template for test-case generation (str.format placeholders; literal
+# braces in the JSON example are doubled). Module-level so it is built once.
+TEST_CASE_PROMPT = """
+You are an expert QA engineer specializing in automated test case generation for Android apps.
+
+Current App Information:
+{app_info}
+
+Current Screen Elements:
+{ui_elements}
+
+Current Screen Context:
+{current_screen}
+
+Your task is to generate comprehensive test cases based on the UI elements and app context.
+For each test case, include:
+1. Test case ID and title
+2. Preconditions
+3. Test steps
+4. Expected results
+5. Assertions
+6. Priority level
+7. Test type (functional, UI, etc.)
+
+Format the output as a JSON array of test cases with the following structure:
+[
+    {{
+        "test_case_id": "TC-001",
+        "title": "Test case title",
+        "description": "Detailed description",
+        "preconditions": ["Precondition 1", "Precondition 2"],
+        "steps": [
+            {{
+                "step_number": 1,
+                "action": "Action description",
+                "element": {{
+                    "type": "element type",
+                    "identifier": "element identifier",
+                    "value": "element value"
+                }},
+                "expected_result": "Expected result"
+            }}
+        ],
+        "assertions": ["Assertion 1", "Assertion 2"],
+        "priority": "High/Medium/Low",
+        "test_type": "Functional/UI/Performance",
+        "tags": ["tag1", "tag2"]
+    }}
+]
+
+Focus on generating:
+1. Functional test cases for core features
+2. UI test cases for layout and interaction
+3. Edge cases and error scenarios
+4. Navigation flows
+5. Data validation cases
+
+Ensure test cases are:
+- Independent and self-contained
+- Have clear success criteria
+- Include proper assertions
+- Cover both positive and negative scenarios
+"""
+
 class TestCaseGenerator:
     def __init__(self, appium_handler: AppiumHandler):
         self.appium_handler = appium_handler
+        # Per-screen cache: within one screen visit, analyze_screen and the
+        # crawl's click-candidate scan share a single page-source fetch and
+        # parse instead of paying a UiAutomator2 snapshot each
+        self._cached_activity = None
+        self._cached_elements = None
+        self._cached_screen_info = None
+        # LLM responses keyed by (activity, element fingerprint): crawls
+        # revisit similar layouts constantly, and a repeat visit should not
+        # pay another multi-second Gemini round-trip. Unbounded within a
+        # session - each entry is a small list of dicts.
+        self._llm_cache = {}
+        # Single background worker that carries the in-flight LLM call
+        # while the crawl performs its navigation click
+        self._llm_pool = ThreadPoolExecutor(max_workers=1)
+        # Settings are per-session; applied once before the first snapshot
+        self._snapshot_settings_applied = False
         try:
-            self.model = genai.GenerativeModel(MODEL_NAME)
-            self.llm = GoogleGenerativeAI(
-                model=MODEL_NAME,
-                google_api_key=GOOGLE_API_KEY,
-                temperature=0.7,
-                convert_system_message_to_human=True
+            # response_mime_type makes Gemini emit bare JSON: no markdown
+            # fences to strip, no tokens wasted on them, one parse pass
+            self.model = genai.GenerativeModel(
+                MODEL_NAME,
+                generation_config={
+                    'response_mime_type': 'application/json',
+                    'temperature': 0.7,
+                }
             )
-            print(f"Successfully initialized Gemini model: {MODEL_NAME}")
+            logger.info("Successfully initialized Gemini model: %s", MODEL_NAME)
         except Exception as e:
-            print(f"Error initializing Gemini model: {e}")
+            logger.error("Error initializing Gemini model: %s", e)
             raise
-        
-        # Define prompt templates
-        self.test_case_prompt = PromptTemplate(
-            input_variables=["app_info", "ui_elements", "current_screen"],
-            template="""
-            You are an expert QA engineer specializing in automated test case generation for Android apps.
-            
-            Current App Information:
-            {app_info}
-            
-            Current Screen Elements:
-            {ui_elements}
-            
-            Current Screen Context:
-            {current_screen}
-            
-            Your task is to generate comprehensive test cases based on the UI elements and app context.
-            For each test case, include:
-            1. Test case ID and title
-            2. Preconditions
-            3. Test steps
-            4. Expected results
-            5. Assertions
-            6. Priority level
-            7. Test type (functional, UI, etc.)
-            
-            Format the output as a JSON array of test cases with the following structure:
-            [
-                {{
-                    "test_case_id": "TC-001",
-                    "title": "Test case title",
-                    "description": "Detailed description",
-                    "preconditions": ["Precondition 1", "Precondition 2"],
-                    "steps": [
-                        {{
-                            "step_number": 1,
-                            "action": "Action description",
-                            "element": {{
-                                "type": "element type",
-                                "identifier": "element identifier",
-                                "value": "element value"
-                            }},
-                            "expected_result": "Expected result"
-                        }}
-                    ],
-                    "assertions": ["Assertion 1", "Assertion 2"],
-                    "priority": "High/Medium/Low",
-                    "test_type": "Functional/UI/Performance",
-                    "tags": ["tag1", "tag2"]
-                }}
-            ]
-            
-            Focus on generating:
-            1. Functional test cases for core features
-            2. UI test cases for layout and interaction
-            3. Edge cases and error scenarios
-            4. Navigation flows
-            5. Data validation cases
-            
-            Ensure test cases are:
-            - Independent and self-contained
-            - Have clear success criteria
-            - Include proper assertions
-            - Cover both positive and negative scenarios
-            """
-        )
-        
-        self.test_chain = LLMChain(llm=self.llm, prompt=self.test_case_prompt)
 
     def analyze_screen(self) -> Dict[str, Any]:
         """Analyzes the current screen and returns UI information."""
-        print("\nAnalyzing current screen...")
+        logger.info("Analyzing current screen...")
+        current_activity = self.appium_handler.driver.current_activity if self.appium_handler.driver else None
+        if (current_activity is not None
+                and current_activity == self._cached_activity
+                and self._cached_screen_info is not None):
+            logger.debug("Reusing cached analysis for activity: %s", current_activity)
+            return self._cached_screen_info
+
+        self._apply_snapshot_settings()
         page_source = self.appium_handler.get_page_source()
         if not page_source:
-            print("Warning: Could not get page source")
+            logger.warning("Could not get page source")
             return {}
-            
+
         elements = self.appium_handler.get_actionable_elements(page_source)
-        print(f"Found {len(elements)} actionable elements")
-        
-        current_activity = self.appium_handler.driver.current_activity if self.appium_handler.driver else None
-        print(f"Current activity: {current_activity}")
-        
-        return {
+        logger.info("Found %d actionable elements", len(elements))
+        logger.debug("Current activity: %s", current_activity)
+
+        screen_info = {
             "current_activity": current_activity,
             "elements": elements,
             "screen_info": {
@@ -127,57 +154,93 @@ class TestCaseGenerator:
                 "orientation": self.appium_handler.driver.orientation if self.appium_handler.driver else None
             }
         }
+        self._cached_activity = current_activity
+        self._cached_elements = elements
+        self._cached_screen_info = screen_info
+        return screen_info
+
+    def _apply_snapshot_settings(self):
+        """Caps the UiAutomator2 source snapshot to what analysis uses.
+
+        The default page source serializes the entire view hierarchy,
+        including invisible views and deeply nested layout containers that
+        get_actionable_elements never surfaces. Capping the tree depth and
+        dropping invisible elements shrinks the XML the server builds and
+        ships over the wire on every snapshot.
+        """
+        if self._snapshot_settings_applied or not self.appium_handler.driver:
+            return
+        try:
+            self.appium_handler.driver.execute_script("mobile: setSettings", {
+                "settings": {
+                    "snapshotMaxDepth": 8,
+                    "allowInvisibleElements": False,
+                }
+            })
+            self._snapshot_settings_applied = True
+        except Exception as e:
+            # Older drivers reject unknown settings; full snapshots still work
+            logger.warning("Could not apply snapshot settings: %s", e)
+            self._snapshot_settings_applied = True
 
-    def generate_test_cases(self) -> List[Dict[str, Any]]:
-        """Generates test cases based on the current app state."""
-        print("\nGenerating test cases...")
-        screen_info = self.analyze_screen()
+    def invalidate_screen_cache(self):
+        """Drops the cached analysis after an action that changed the screen."""
+        self._cached_activity = None
+        self._cached_elements = None
+        self._cached_screen_info = None
+
+    def generate_test_cases(self, screen_info: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Generates test cases based on the current app state.
+
+        Accepts a pre-captured screen analysis so callers can run the LLM
+        round-trip off-thread without racing driver calls; without one, the
+        current screen is analyzed here.
+        """
+        logger.info("Generating test cases...")
+        if screen_info is None:
+            screen_info = self.analyze_screen()
         
         if not screen_info.get("elements"):
-            print("No UI elements found to generate test cases from")
+            logger.warning("No UI elements found to generate test cases from")
             return []
         
         # Format UI elements for the prompt
         formatted_elements = self._format_elements_for_prompt(screen_info["elements"])
-        print(f"\nFormatted UI elements:\n{formatted_elements}")
-        
+        logger.debug("Formatted UI elements:\n%s", formatted_elements)
+
+        cache_key = hashlib.sha1(
+            ((screen_info["current_activity"] or "") + formatted_elements).encode()
+        ).hexdigest()
+        cached_cases = self._llm_cache.get(cache_key)
+        if cached_cases is not None:
+            logger.info("Reusing %d cached test cases for this screen layout", len(cached_cases))
+            return cached_cases
+
         try:
             # Generate test cases using the LLM
-            print("\nSending request to Gemini...")
-            response = self.test_chain.run(
+            logger.info("Sending request to Gemini...")
+            prompt = TEST_CASE_PROMPT.format(
                 app_info=json.dumps(screen_info["screen_info"], indent=2),
                 ui_elements=formatted_elements,
                 current_screen=screen_info["current_activity"]
             )
-            print("\nReceived response from Gemini")
-            
+            response = self.model.generate_content(prompt)
+            response_text = response.text
+            logger.info("Received response from Gemini")
+
             try:
-                # Clean the response by removing markdown code block markers and comments
-                cleaned_response = response.strip()
-                if cleaned_response.startswith('```json'):
-                    cleaned_response = cleaned_response[7:]  # Remove ```json
-                if cleaned_response.startswith('```'):
-                    cleaned_response = cleaned_response[3:]  # Remove ```
-                if cleaned_response.endswith('```'):
-                    cleaned_response = cleaned_response[:-3]  # Remove ```
-                cleaned_response = cleaned_response.strip()
-                
-                # Remove any comments from the JSON
-                cleaned_response = '\n'.join(
-                    line for line in cleaned_response.split('\n')
-                    if not line.strip().startswith('//')
-                )
-                
-                print("Cleaned response:", cleaned_response)
-                test_cases = json.loads(cleaned_response)
-                print(f"Successfully parsed {len(test_cases)} test cases")
+                # The JSON mime type guarantees bare, parseable output, so
+                # the old fence/comment stripping is gone
+                test_cases = json.loads(response_text)
+                logger.info("Successfully parsed %d test cases", len(test_cases))
+                self._llm_cache[cache_key] = test_cases
                 return test_cases
             except json.JSONDecodeError as e:
-                print(f"Error parsing test cases from LLM response: {e}")
-                print(f"Raw response: {response}")
+                logger.error("Error parsing test cases from LLM response: %s", e)
+                logger.debug("Raw response: %s", response_text)
                 return []
         except Exception as e:
-            print(f"Error generating test cases: {e}")
+            logger.error("Error generating test cases: %s", e)
             return []
 
     def _format_elements_for_prompt(self, elements: List[Dict[str, Any]]) -> str:
@@ -193,7 +256,9 @@ class TestCaseGenerator:
                 element_info.append(f"Resource ID: {elem['resource-id']}")
             if elem.get('class'):
                 element_info.append(f"Type: {elem['class']}")
-            if elem.get('clickable') == 'true':
+            # Truthy check: parsed elements carry clickable as a bool, and
+            # the old == 'true' string comparison silently never matched
+            if elem.get('clickable'):
                 element_info.append("Clickable")
             
             if element_info:
@@ -204,61 +269,102 @@ class TestCaseGenerator:
     def save_test_cases(self, test_cases: List[Dict[str, Any]], filename: str = "generated_test_cases.json"):
         """Saves generated test cases to a JSON file."""
         if not test_cases:
-            print("Warning: No test cases to save")
+            logger.warning("No test cases to save")
             return
             
         try:
-            with open(filename, 'w') as f:
-                json.dump(test_cases, f, indent=2)
-            print(f"Successfully saved {len(test_cases)} test cases to {filename}")
+            if orjson is not None:
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(test_cases, option=orjson.OPT_INDENT_2))
+            else:
+                with open(filename, 'w') as f:
+                    json.dump(test_cases, f, indent=2)
+            logger.info("Successfully saved %d test cases to %s", len(test_cases), filename)
         except Exception as e:
-            print(f"Error saving test cases: {e}")
+            logger.error("Error saving test cases: %s", e)
+
+    @staticmethod
+    def _screen_fingerprint(elements: List[Dict[str, Any]]) -> bytes:
+        """Stable fingerprint of a screen's element list."""
+        payload = json.dumps(
+            [(e.get('resource-id'), e.get('text')) for e in elements],
+            sort_keys=True)
+        return hashlib.blake2b(payload.encode(), digest_size=16).digest()
 
     def crawl_app(self, max_screens: int = 10):
         """Crawls through the app to discover different screens and generate test cases."""
-        print(f"\nStarting app crawl (max screens: {max_screens})")
-        visited_screens = set()
+        logger.info("Starting app crawl (max screens: %d)", max_screens)
+        # Visited screens are keyed on a fingerprint of the element list,
+        # not the activity name: one activity often hosts several distinct
+        # fragment screens, and conversely re-entering an identical layout
+        # should not cost another analysis
+        visited_fingerprints = set()
+        failed_clicks = set()
         all_test_cases = []
-        
-        while len(visited_screens) < max_screens:
-            current_activity = self.appium_handler.driver.current_activity
-            if current_activity in visited_screens:
-                print(f"Already visited {current_activity}, stopping crawl")
+
+        while len(visited_fingerprints) < max_screens:
+            screen_info = self.analyze_screen()
+            current_activity = screen_info.get("current_activity")
+            if not screen_info.get("elements"):
+                logger.info("No elements found on screen, stopping crawl")
                 break
-                
-            visited_screens.add(current_activity)
-            print(f"\nAnalyzing screen: {current_activity}")
-            
-            # Generate test cases for current screen
-            screen_test_cases = self.generate_test_cases()
-            if screen_test_cases:
-                print(f"Generated {len(screen_test_cases)} test cases for {current_activity}")
-                all_test_cases.extend(screen_test_cases)
-            else:
-                print(f"No test cases generated for {current_activity}")
-            
-            # Try to navigate to a new screen
-            elements = self.appium_handler.get_actionable_elements(self.appium_handler.get_page_source())
-            print(f"Found {len(elements)} elements to potentially click")
-            
+
+            fingerprint = self._screen_fingerprint(screen_info["elements"])
+            if fingerprint in visited_fingerprints:
+                logger.info("Already visited this screen layout (%s), stopping crawl", current_activity)
+                break
+
+            visited_fingerprints.add(fingerprint)
+            logger.info("Analyzing screen: %s", current_activity)
+
+            # Kick the LLM round-trip off on the background worker; it only
+            # uses the snapshot just captured, so it cannot race the
+            # navigation click below
+            llm_future = self._llm_pool.submit(self.generate_test_cases, screen_info)
+
+            # Try to navigate to a new screen using the already-parsed
+            # element list while the LLM call is in flight
+            elements = screen_info["elements"]
+            logger.debug("Found %d elements to potentially click", len(elements))
+
             clicked = False
             for elem in elements:
-                if elem.get('clickable') == 'true':
-                    try:
-                        content_desc = elem.get('content-desc', '')
-                        print(f"Attempting to click element with description: {content_desc}")
-                        self.appium_handler.find_and_click(AppiumBy.ACCESSIBILITY_ID, content_desc)
-                        print("Click successful")
-                        time.sleep(2)  # Wait for screen transition
-                        clicked = True
-                        break
-                    except Exception as e:
-                        print(f"Error clicking element: {e}")
+                if not elem.get('clickable'):
+                    continue
+                content_desc = elem.get('content-desc', '')
+                # Skip unlabelled elements and ones that already failed, so
+                # retries don't hammer the same dead clickable every visit
+                if not content_desc or content_desc in failed_clicks:
+                    continue
+                try:
+                    logger.debug("Attempting to click element with description: %s", content_desc)
+                    if not self.appium_handler.find_and_click(AppiumBy.ACCESSIBILITY_ID, content_desc):
+                        failed_clicks.add(content_desc)
                         continue
-            
+                    logger.debug("Click successful")
+                    # The click moved us to a new screen; the cached
+                    # analysis no longer describes what's on display
+                    self.invalidate_screen_cache()
+                    time.sleep(2)  # Wait for screen transition
+                    clicked = True
+                    break
+                except Exception as e:
+                    logger.warning("Error clicking element: %s", e)
+                    failed_clicks.add(content_desc)
+                    continue
+
+            # Collect the overlapped LLM result before the next iteration
+            screen_test_cases = llm_future.result()
+            if screen_test_cases:
+                logger.info("Generated %d test cases for %s", len(screen_test_cases), current_activity)
+                all_test_cases.extend(screen_test_cases)
+            else:
+                logger.info("No test cases generated for %s", current_activity)
+
             if not clicked:
-                print("No clickable elements found, stopping crawl")
+                logger.info("No clickable elements found, stopping crawl")
                 break
-        
-        print(f"\nCrawl completed. Visited {len(visited_screens)} screens and generated {len(all_test_cases)} test cases")
+
+        logger.info("Crawl completed. Visited %d screens and generated %d test cases",
+                    len(visited_fingerprints), len(all_test_cases))
         return all_test_cases 
\ No newline at end of file
@@ -1,16 +1,31 @@
 # utils/ui_analyzer.py
 from appium.webdriver.common.appiumby import AppiumBy
-import xml.etree.ElementTree as ET
+try:
+    from lxml import etree
+    _HAVE_LXML = True
+except ImportError:
+    # Stdlib fallback: modern CPython ships the C-accelerated _elementtree
+    # behind this import, so parsing stays out of pure Python either way
+    import xml.etree.ElementTree as etree
+    _HAVE_LXML = False
+_XML_PARSE_ERROR = etree.XMLSyntaxError if _HAVE_LXML else etree.ParseError
 import google.generativeai as genai
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langchain.chains import LLMChain
+import hashlib
 import json
+import math
 import os
+from io import BytesIO
 from dotenv import load_dotenv
+import logging
+import sys
 import time
-from threading import Lock
-from datetime import datetime, timedelta
+import types
+from threading import RLock, get_ident
+from collections import deque
+
+# Lazy %s formatting keeps the big prompt/response bodies out of the log
+# pipeline entirely unless DEBUG is enabled
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -23,65 +38,123 @@ TEMPERATURE = float(os.getenv('TEMPERATURE', 0.7))
 # Configure Gemini
 genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
 
-# List available models
-print("\nListing available models:")
-try:
-    models = genai.list_models()
-    for model in models:
-        print(f"- {model.name}")
-        print(f"  Supported methods: {model.supported_generation_methods}")
-except Exception as e:
-    print(f"Error listing models: {e}")
+def _list_models_cached(ttl_seconds=24 * 3600):
+    """
+    Lists available models through a JSON disk cache with a 24h TTL, so the
+    listing costs one HTTPS round-trip per day instead of one per process.
+    """
+    cache_path = os.path.expanduser('~/.cache/ai_android_tester/models.json')
+    try:
+        if time.time() - os.path.getmtime(cache_path) < ttl_seconds:
+            with open(cache_path) as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    models = [
+        {'name': m.name,
+         'supported_generation_methods': list(m.supported_generation_methods)}
+        for m in genai.list_models()
+    ]
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(models, f)
+    except OSError:
+        pass
+    return models
+
+# List available models only on request: every pytest worker and Appium
+# session imports this module, and the listing is purely informational
+if os.getenv('AI_TESTER_DEBUG_LIST_MODELS'):
+    print("\nListing available models:")
+    try:
+        for model_info in _list_models_cached():
+            print(f"- {model_info['name']}")
+            print(f"  Supported methods: {model_info['supported_generation_methods']}")
+    except Exception as e:
+        print(f"Error listing models: {e}")
+
+# Reused across responses; json.loads builds a fresh decoder on every call
+_JSON_DECODER = json.JSONDecoder()
+
+# Maps the LLM's 'by' strings to AppiumBy values. Built once at import and
+# wrapped read-only so no call site can mutate the shared table; the old
+# version rebuilt this dict for every decided action.
+_BY_MAP = types.MappingProxyType({
+    'accessibility_id': AppiumBy.ACCESSIBILITY_ID,
+    'xpath': AppiumBy.XPATH,
+    'id': AppiumBy.ID,
+    'class_name': AppiumBy.CLASS_NAME,
+    'description': AppiumBy.ACCESSIBILITY_ID,  # Map 'description' to accessibility_id
+})
 
 # Rate limiting setup
 class RateLimiter:
     def __init__(self, requests_per_minute):
         self.requests_per_minute = requests_per_minute
-        self.requests = []
-        self.lock = Lock()
+        # Monotonic timestamps of recent requests; deque gives O(1) eviction
+        # from the front, and monotonic() is immune to wall-clock jumps
+        self.requests = deque()
+        # Re-entrant so a holder can call back into the limiter safely now
+        # that one instance is shared by every chain (and their threads)
+        self.lock = RLock()
         self.retry_count = 0
         self.max_retries = 3
         self.driver = None  # Will be set when needed
+        self._driver_thread = None
     
     def set_driver(self, driver):
         """Set the driver for keepalive pings."""
         self.driver = driver
+        self._driver_thread = get_ident()
     
     def _send_keepalive(self):
         """Send a keepalive command to maintain the session."""
-        if self.driver:
+        # The Appium session may only be driven from the thread that set the
+        # driver; rate-limit waits on other threads skip the ping
+        if self.driver and get_ident() == self._driver_thread:
             try:
                 # Get current activity - a lightweight operation
                 self.driver.current_activity
             except:
                 pass  # Ignore any errors during keepalive
     
+    def has_headroom(self):
+        """True when a request could be sent right now without waiting."""
+        with self.lock:
+            now = time.monotonic()
+            while self.requests and now - self.requests[0] >= 60.0:
+                self.requests.popleft()
+            return len(self.requests) < self.requests_per_minute
+
     def wait_if_needed(self):
         with self.lock:
-            now = datetime.now()
-            # Remove requests older than 1 minute
-            self.requests = [req for req in self.requests if now - req < timedelta(minutes=1)]
-            
+            now = time.monotonic()
+            # Drop requests older than 1 minute from the front, in place
+            while self.requests and now - self.requests[0] >= 60.0:
+                self.requests.popleft()
+
             if len(self.requests) >= self.requests_per_minute:
                 # Wait until the oldest request is 1 minute old
-                wait_time = (self.requests[0] + timedelta(minutes=1) - now).total_seconds()
+                wait_time = self.requests[0] + 60.0 - now
                 if wait_time > 0:
-                    print(f"Rate limit reached. Waiting {wait_time:.1f} seconds...")
+                    logger.info("Rate limit reached. Waiting %.1f seconds...", wait_time)
                     # Send keepalive every 10 seconds
                     while wait_time > 0:
                         time.sleep(min(10, wait_time))
                         wait_time -= 10
                         self._send_keepalive()
-                    self.requests = self.requests[1:]
-            
-            self.requests.append(now)
+                    self.requests.popleft()
+
+            self.requests.append(time.monotonic())
     
     def handle_rate_limit_error(self, error_message):
         """Handle rate limit errors with exponential backoff."""
         if "429" in error_message and self.retry_count < self.max_retries:
             self.retry_count += 1
             wait_time = 2 ** self.retry_count  # Exponential backoff: 2, 4, 8 seconds
-            print(f"Rate limit error. Retry {self.retry_count}/{self.max_retries}. Waiting {wait_time} seconds...")
+            logger.info("Rate limit error. Retry %d/%d. Waiting %d seconds...",
+                        self.retry_count, self.max_retries, wait_time)
             # Send keepalive every 10 seconds
             while wait_time > 0:
                 time.sleep(min(10, wait_time))
@@ -93,16 +166,214 @@ class RateLimiter:
 # Initialize rate limiter with a more conservative limit
 rate_limiter = RateLimiter(requests_per_minute=1)  # Only 1 request per minute
 
-# Initialize the model
-model = genai.GenerativeModel(MODEL_NAME)
+class LLMCache:
+    """
+    Exact-match cache of raw LLM responses, keyed on a SHA-256 of the model,
+    temperature and full prompt text. Backed by an in-memory dict that is
+    spilled to a JSON file so repeat runs (reruns, deterministic flows) skip
+    both the network round-trip and any rate-limit wait.
+    """
+    def __init__(self, path=None):
+        self.path = path or os.path.expanduser(
+            '~/.cache/ai_android_tester/llm_cache.json')
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.path) as f:
+                self._store = json.load(f)
+        except (OSError, ValueError):
+            self._store = {}
+
+    @staticmethod
+    def cache_key(prompt):
+        payload = json.dumps({'m': MODEL_NAME, 't': TEMPERATURE, 'p': prompt},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        response = self._store.get(key)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def set(self, key, response_text):
+        self._store[key] = response_text
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump(self._store, f)
+        except OSError as e:
+            logger.warning("Could not persist LLM cache: %s", e)
+
+# Shared across UIChain instances; responses only vary with the prompt
+llm_cache = LLMCache()
+
+class SemanticCache:
+    """
+    Near-duplicate prompt cache. Consecutive decision prompts often differ
+    only in a history line or one UI attribute while the verdict is
+    identical, which an exact hash can never catch. Each prompt is embedded,
+    and the stored response is reused when the best cosine similarity clears
+    a high threshold. The threshold is deliberately strict (0.95): a reused
+    decision carries actions as well as a verdict, so only screens that are
+    effectively identical should ever match.
+    """
+    def __init__(self, threshold=0.95, max_entries=1000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries = []  # (normalized vector, response_text), LRU order
+
+    def _embed(self, prompt):
+        try:
+            result = genai.embed_content(model='models/text-embedding-004',
+                                         content=prompt)
+            vector = result['embedding']
+        except Exception as e:
+            logger.warning("Embedding failed, skipping semantic cache: %s", e)
+            return None
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def get(self, prompt):
+        """Returns (vector, cached response or None) for the prompt."""
+        vector = self._embed(prompt)
+        if vector is None:
+            return None, None
+        best_index = None
+        best_similarity = 0.0
+        for index, (stored_vector, _response) in enumerate(self.entries):
+            similarity = sum(a * b for a, b in zip(vector, stored_vector))
+            if similarity > best_similarity:
+                best_similarity = similarity
+                best_index = index
+        if best_index is not None and best_similarity >= self.threshold:
+            entry = self.entries.pop(best_index)
+            self.entries.append(entry)  # Refresh LRU position
+            logger.info("Semantic cache hit (similarity %.3f)", best_similarity)
+            return vector, entry[1]
+        return vector, None
+
+    def set(self, vector, response_text):
+        if vector is None:
+            return
+        self.entries.append((vector, response_text))
+        if len(self.entries) > self.max_entries:
+            self.entries.pop(0)
+
+semantic_cache = SemanticCache()
+
+
+# Static rubric block, hoisted to module scope and placed at the very start
+# of every prompt. Keeping this prefix byte-identical across calls is what
+# lets provider-side prompt caching (and our own exact cache) actually hit;
+# the dynamic goal/history/elements content is appended after it. One rubric
+# covers both halves of a step: verifying the goal on the current screen and
+# deciding the next action(s), so each step costs a single model call
+# instead of a decide round-trip plus a verify round-trip.
+DECISION_RUBRIC = """You are an AI assistant helping to test an Android app. Your task is twofold: first verify whether a specific goal has already been achieved on the current screen, then determine what action(s) are needed next.
+
+Part 1 - Verification. Analyze the available UI elements and determine the status of the goal.
+
+For text input goals (like "Enter username standard_user"):
+1. Look for input fields (EditText elements) that match the field name
+2. Check if the field's current text matches the expected value
+3. If the text matches exactly, the goal is ACHIEVED
+4. If the field exists but has different text, the goal is NOT YET MET
+5. If the field doesn't exist or is not accessible, the goal is FAILED
 
-# Configure LangChain with Google Generative AI
-llm = GoogleGenerativeAI(
-    model=MODEL_NAME,
-    google_api_key=os.getenv('GOOGLE_API_KEY'),
-    temperature=TEMPERATURE,
-    convert_system_message_to_human=True
-)
+For button click goals:
+1. Look for the button in the current UI
+2. If the button is not visible and we're on the expected next screen, the goal is ACHIEVED
+3. If the button is still visible and we're on the same screen, the goal is NOT YET MET
+4. If we're on an unexpected screen, the goal is FAILED
+
+For navigation goals:
+1. Check if we're on the expected screen
+2. If we're on the target screen with expected elements, the goal is ACHIEVED
+3. If we're on the current screen but haven't reached the target, the goal is NOT YET MET
+4. If we're on an unexpected screen, the goal is FAILED
+
+Part 2 - Action selection. If the goal is not yet achieved, determine what action(s) are needed to achieve it.
+
+For text input goals (like "Enter username standard_user"):
+1. Look for input fields (EditText elements) that match the field name
+2. Check the resource-id, text, and content-desc of each element
+3. For username/password fields, look for elements with:
+   - resource-id containing "username" or "user-name"
+   - text containing "Username" or "User Name"
+   - content-desc containing "username" or "user name"
+4. The action should be "type" with the exact text to enter
+5. Use the most reliable identifier (preferably resource-id)
+
+For button click goals:
+1. Look for buttons that match the goal description
+2. Use the most reliable identifier (preferably resource-id or content-desc)
+3. The action should be "click"
+4. The element will be automatically scrolled into view if needed
+
+For navigation goals:
+1. Look for navigation elements (tabs, menu items, etc.)
+2. Use the most reliable identifier
+3. The action should be "click"
+4. The element will be automatically scrolled into view if needed
+
+Your response should be a JSON object with the following structure:
+{
+    "verification": {
+        "status": "ACHIEVED|FAILED|NOT_YET_MET",  // The current status of the goal
+        "reason": "explanation of the current status",
+        "confidence": 0.95,  // Confidence score between 0 and 1
+        "next_action_needed": true/false,  // Whether another action is needed
+        "details": "additional details about the verification process"
+    },
+    "actions": [
+        {
+            "action_type": "click",  // The type of action to take (click, type)
+            "by": "accessibility_id",  // How to find the element (accessibility_id, xpath, etc.)
+            "value": "element_value",  // The value to use to find the element
+            "input": "text_to_type"  // Optional: text to type if action_type is "type"
+        },
+        // ... more actions if needed; use an empty array if the goal is already ACHIEVED
+    ],
+    "reasoning": "explanation of why these actions were chosen",
+    "confidence": 0.95,  // Confidence score between 0 and 1
+    "state_update": "description of how the app state will change after these actions"
+}
+
+Only respond with the JSON object, nothing else. Do not include any markdown formatting or code block markers.
+
+The goal, previous actions, current state and available UI elements follow."""
+
+# Model handle, created lazily on first use: the CachedContent attempt is
+# a blocking HTTPS round-trip, which importing this module must not pay
+_model = None
+# True when the rubric lives provider-side as cached content and therefore
+# must not also be prepended to each prompt
+_rubric_cached = False
+
+def _get_model():
+    """
+    Returns the shared Gemini model, creating it on the first call. When
+    the API accepts it, the static action rubric is registered as
+    provider-side cached content so Gemini reuses the prompt prefix tokens
+    across calls; rubrics below the minimum cacheable context size are
+    rejected, in which case the plain model is used and the rubric rides
+    along in every prompt instead.
+    """
+    global _model, _rubric_cached
+    if _model is None:
+        try:
+            cached_rubric = genai.caching.CachedContent.create(
+                model=MODEL_NAME, contents=[DECISION_RUBRIC])
+            _model = genai.GenerativeModel.from_cached_content(cached_rubric)
+            _rubric_cached = True
+            logger.info("Using provider-side cached prompt prefix")
+        except Exception as e:
+            logger.info("Provider-side prompt caching unavailable: %s", e)
+            _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
 
 def get_actionable_elements(page_source):
     """
@@ -113,524 +384,369 @@ def get_actionable_elements(page_source):
     elements = []
     if not page_source:
         return elements
+    # Both parsers consume bytes directly; only encode when handed a str,
+    # and surrogatepass keeps lone surrogates in the dump from raising here
+    if isinstance(page_source, str):
+        page_source = page_source.encode('utf-8', 'surrogatepass')
+    seen_identifiers = set()
 
     try:
-        root = ET.fromstring(page_source)
-        # Find elements that are typically clickable/actionable
-        for elem in root.findall('.//*[@clickable="true"], .//*[@content-desc], .//android.widget.Button'):
+        # Stream the document instead of materializing the full DOM: each
+        # node is checked once on its 'end' event and freed right after
+        # (the canonical lxml fast-iter pattern), so peak memory tracks the
+        # actionable nodes rather than the whole hierarchy.
+        for _event, elem in etree.iterparse(
+                BytesIO(page_source), events=('end',)):
             attrs = elem.attrib
-            element_info = {
-                'class': attrs.get('class'),
-                'text': attrs.get('text'),
-                'content-desc': attrs.get('content-desc'),
-                'resource-id': attrs.get('resource-id'),
-                'clickable': attrs.get('clickable') == 'true',
-                # Add bounds if needed for coordinate-based clicks
-                'bounds': attrs.get('bounds'),
-                # Reference to the XML element itself (optional, for advanced parsing)
-                # 'xml_element': elem
-            }
-            # Filter out elements without useful identifiers (text or content-desc)
-            if element_info['text'] or element_info['content-desc']:
-                 elements.append(element_info)
-
-    except ET.ParseError as e:
-        print(f"Error parsing XML: {e}")
+            if (attrs.get('clickable') == 'true' or attrs.get('content-desc')
+                    or elem.tag == 'android.widget.Button'):
+                # Check the identifier before building anything: duplicates
+                # and identifier-less nodes never allocate a dict
+                identifier = attrs.get('content-desc') or attrs.get('text')
+                if identifier and identifier not in seen_identifiers:
+                    seen_identifiers.add(identifier)
+                    elements.append({
+                        'class': attrs.get('class'),
+                        'text': attrs.get('text'),
+                        'content-desc': attrs.get('content-desc'),
+                        'resource-id': attrs.get('resource-id'),
+                        'clickable': attrs.get('clickable') == 'true',
+                        # Add bounds if needed for coordinate-based clicks
+                        'bounds': attrs.get('bounds'),
+                    })
+            elem.clear()
+            # Releasing earlier siblings needs lxml's parent pointers; the
+            # stdlib fallback only clears the node itself
+            if _HAVE_LXML:
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+    except _XML_PARSE_ERROR as e:
+        logger.error("Error parsing XML: %s", e)
     except Exception as e:
-        print(f"An unexpected error occurred during XML parsing: {e}")
+        logger.error("An unexpected error occurred during XML parsing: %s", e)
 
+    return elements
 
-    # Basic deduplication based on text/content-desc
-    unique_elements = []
-    seen_identifiers = set()
-    for elem in elements:
-        identifier = elem['content-desc'] or elem['text']
-        if identifier and identifier not in seen_identifiers:
-            unique_elements.append(elem)
-            seen_identifiers.add(identifier)
+def _elements_signature(elements):
+    """
+    Builds a stable, hashable fingerprint of the actionable elements so LLM
+    decisions can be memoized per (goal, screen) pair.
+    """
+    identifiers = sorted(
+        (
+            elem.get('resource-id') or elem.get('content-desc') or elem.get('text') or '',
+            # Editable fields keep their identifier while their content
+            # changes; typed text must be part of the key, otherwise a
+            # re-verification after a "type" action hits the pre-type memo
+            # entry and the action cache replays the same keystrokes
+            (elem.get('text') or '') if 'EditText' in (elem.get('class') or '') else '',
+        )
+        for elem in elements
+    )
+    return hashlib.blake2b(json.dumps(identifiers).encode(), digest_size=16).digest()
 
-    return unique_elements
+def _element_line(elem):
+    """Pre-joined one-line description of an element, or None if it has no
+    describable attributes."""
+    parts = []
+    text = elem.get('text')
+    if text:
+        parts.append(f"text: '{text}'")
+    content_desc = elem.get('content-desc')
+    if content_desc:
+        parts.append(f"description: '{content_desc}'")
+    class_name = elem.get('class')
+    if class_name:
+        parts.append(f"type: {class_name}")
+    # Truthy check: parsed elements carry clickable as a bool, and the old
+    # == 'true' string comparison silently never matched
+    if elem.get('clickable'):
+        parts.append("clickable")
+    return " - " + ", ".join(parts) if parts else None
 
 def format_elements_for_llm(elements):
     """Formats the UI elements into a natural language description for the LLM."""
-    element_descriptions = []
-    for elem in elements:
-        desc = []
-        if elem.get('text'):
-            desc.append(f"text: '{elem['text']}'")
-        if elem.get('content-desc'):
-            desc.append(f"description: '{elem['content-desc']}'")
-        if elem.get('class'):
-            desc.append(f"type: {elem['class']}")
-        if elem.get('clickable') == 'true':
-            desc.append("clickable")
-        if desc:
-            element_descriptions.append(" - " + ", ".join(desc))
-    
-    return "\n".join(element_descriptions)
+    # Feed join a generator directly instead of accumulating an outer list
+    return "\n".join(line for line in map(_element_line, elements) if line)
 
 class UIChain:
     def __init__(self):
-        # Create prompt templates for different AI tasks
-        self.action_prompt = PromptTemplate(
-            input_variables=["goal", "elements", "history", "current_state"],
-            template="""
-            You are an AI assistant helping to test an Android app. Your goal is to help navigate the app to achieve a specific goal.
-            
-            Previous actions taken:
-            {history}
-            
-            Current state of the app:
-            {current_state}
-            
-            Current goal: {goal}
-            
-            Available UI elements:
-            {elements}
-            
-            Please analyze the available UI elements and determine what action(s) are needed to achieve the goal.
-            
-            For text input goals (like "Enter username standard_user"):
-            1. Look for input fields (EditText elements) that match the field name
-            2. Check the resource-id, text, and content-desc of each element
-            3. For username/password fields, look for elements with:
-               - resource-id containing "username" or "user-name"
-               - text containing "Username" or "User Name"
-               - content-desc containing "username" or "user name"
-            4. The action should be "type" with the exact text to enter
-            5. Use the most reliable identifier (preferably resource-id)
-            
-            For button click goals:
-            1. Look for buttons that match the goal description
-            2. Use the most reliable identifier (preferably resource-id or content-desc)
-            3. The action should be "click"
-            4. The element will be automatically scrolled into view if needed
-            
-            For navigation goals:
-            1. Look for navigation elements (tabs, menu items, etc.)
-            2. Use the most reliable identifier
-            3. The action should be "click"
-            4. The element will be automatically scrolled into view if needed
-            
-            Your response should be a JSON object with the following structure:
-            {{
-                "actions": [
-                    {{
-                        "action_type": "click",  // The type of action to take (click, type)
-                        "by": "accessibility_id",  // How to find the element (accessibility_id, xpath, etc.)
-                        "value": "element_value",  // The value to use to find the element
-                        "input": "text_to_type"  // Optional: text to type if action_type is "type"
-                    }},
-                    // ... more actions if needed
-                ],
-                "reasoning": "explanation of why these actions were chosen",
-                "confidence": 0.95,  // Confidence score between 0 and 1
-                "state_update": "description of how the app state will change after these actions"
-            }}
-            
-            Only respond with the JSON object, nothing else. Do not include any markdown formatting or code block markers.
-            """
-        )
-        
-        self.verification_prompt = PromptTemplate(
-            input_variables=["goal", "elements", "history", "current_state"],
-            template="""
-            You are an AI assistant helping to test an Android app. Your task is to verify if a specific goal has been achieved.
-            
-            Previous actions taken:
-            {history}
-            
-            Current state of the app:
-            {current_state}
-            
-            Goal to verify: {goal}
-            
-            Available UI elements:
-            {elements}
-            
-            Please analyze the available UI elements and determine the status of the goal.
-            
-            For text input goals (like "Enter username standard_user"):
-            1. Look for input fields (EditText elements) that match the field name
-            2. Check if the field's current text matches the expected value
-            3. If the text matches exactly, the goal is ACHIEVED
-            4. If the field exists but has different text, the goal is NOT YET MET
-            5. If the field doesn't exist or is not accessible, the goal is FAILED
-            
-            For button click goals:
-            1. Look for the button in the current UI
-            2. If the button is not visible and we're on the expected next screen, the goal is ACHIEVED
-            3. If the button is still visible and we're on the same screen, the goal is NOT YET MET
-            4. If we're on an unexpected screen, the goal is FAILED
-            
-            For navigation goals:
-            1. Check if we're on the expected screen
-            2. If we're on the target screen with expected elements, the goal is ACHIEVED
-            3. If we're on the current screen but haven't reached the target, the goal is NOT YET MET
-            4. If we're on an unexpected screen, the goal is FAILED
-            
-            Your response should be a JSON object with the following structure:
-            {{
-                "status": "ACHIEVED|FAILED|NOT_YET_MET",  // The current status of the goal
-                "reason": "explanation of the current status",
-                "confidence": 0.95,  // Confidence score between 0 and 1
-                "next_action_needed": true/false,  // Whether another action is needed
-                "details": "additional details about the verification process"
-            }}
-            
-            Only respond with the JSON object, nothing else.
-            """
-        )
-        
-        # Initialize memory as a list
-        self.memory = []
+        # Prompt text lives in the module-level rubric constants shared
+        # with the direct Gemini path; nothing is duplicated per instance.
+
+        # Action history, capped at the last 20 entries: an unbounded list
+        # made every later prompt longer (quadratic total tokens over a
+        # run), and a stable-length history also stops older entries from
+        # shifting the cacheable prompt prefix
+        self.memory = deque(maxlen=20)
         self.current_state = "App launched"
         
-        # Create the chains
-        self.action_chain = LLMChain(
-            llm=llm,
-            prompt=self.action_prompt,
-            verbose=True
-        )
-        
-        self.verification_chain = LLMChain(
-            llm=llm,
-            prompt=self.verification_prompt,
-            verbose=True
-        )
-        
-        # Initialize rate limiter
-        self.rate_limiter = RateLimiter(requests_per_minute=60)  # 60 requests per minute (1 per second)
-    
-    def choose_next_action(self, elements, goal):
+        # All chains share the module-level limiter: Gemini enforces one
+        # quota per API key, so per-instance limiters would each think the
+        # full budget was theirs and collectively trigger 429 backoffs
+        self.rate_limiter = rate_limiter
+
+        # Memo of past LLM decisions keyed by (goal, elements signature), so
+        # revisiting the same screen for the same goal (retries, "go back"
+        # loops) skips the LLM round-trip entirely
+        self._action_cache = {}
+        self._verification_cache = {}
+        # Last combined decision as (cache key, parsed data): a
+        # verify-then-act pair on the same screen shares one model call
+        self._last_decision = None
+
+    def _decide_and_verify(self, elements, goal):
         """
-        Uses Gemini to choose the next action(s) based on available elements and goal.
-        Returns a list of tuples: [(action_type, by, value, input), ...]
+        Makes the single combined LLM call behind both public methods: the
+        response carries a 'verification' object and an 'actions' array for
+        the same screen. Returns the parsed decision dict, or None when all
+        attempts failed.
         """
-        print("\n--- AI Action Selection ---")
-        print(f"Goal: {goal}")
-        print(f"Current state: {self.current_state}")
-        
+        cache_key = (goal, _elements_signature(elements))
+        if self._last_decision and self._last_decision[0] == cache_key:
+            logger.debug("Reusing last combined decision for this goal/screen")
+            return self._last_decision[1]
+
         # Format the elements for the LLM
         elements_description = format_elements_for_llm(elements)
-        print(f"\nAvailable UI elements:\n{elements_description}")
-        
+        logger.debug("Available UI elements:\n%s", elements_description)
+
         try:
-            # Apply rate limiting
-            self.rate_limiter.wait_if_needed()
-            
             # Format history as a string
             history_str = "\n".join(self.memory) if self.memory else "No previous actions taken."
-            
-            # Create the prompt
-            prompt = f"""
-            You are an AI assistant helping to test an Android app. Your goal is to help navigate the app to achieve a specific goal.
-            
-            Previous actions taken:
-            {history_str}
-            
-            Current state of the app:
-            {self.current_state}
-            
-            Current goal: {goal}
-            
-            Available UI elements:
-            {elements_description}
-            
-            Please analyze the available UI elements and determine what action(s) are needed to achieve the goal.
-            
-            For text input goals (like "Enter username standard_user"):
-            1. Look for input fields (EditText elements) that match the field name
-            2. Check the resource-id, text, and content-desc of each element
-            3. For username/password fields, look for elements with:
-               - resource-id containing "username" or "user-name"
-               - text containing "Username" or "User Name"
-               - content-desc containing "username" or "user name"
-            4. The action should be "type" with the exact text to enter
-            5. Use the most reliable identifier (preferably resource-id)
-            
-            For button click goals:
-            1. Look for buttons that match the goal description
-            2. Use the most reliable identifier (preferably resource-id or content-desc)
-            3. The action should be "click"
-            4. The element will be automatically scrolled into view if needed
-            
-            For navigation goals:
-            1. Look for navigation elements (tabs, menu items, etc.)
-            2. Use the most reliable identifier
-            3. The action should be "click"
-            4. The element will be automatically scrolled into view if needed
-            
-            Your response should be a JSON object with the following structure:
-            {{
-                "actions": [
-                    {{
-                        "action_type": "click",  // The type of action to take (click, type)
-                        "by": "accessibility_id",  // How to find the element (accessibility_id, xpath, etc.)
-                        "value": "element_value",  // The value to use to find the element
-                        "input": "text_to_type"  // Optional: text to type if action_type is "type"
-                    }},
-                    // ... more actions if needed
-                ],
-                "reasoning": "explanation of why these actions were chosen",
-                "confidence": 0.95,  // Confidence score between 0 and 1
-                "state_update": "description of how the app state will change after these actions"
-            }}
-            
-            Only respond with the JSON object, nothing else. Do not include any markdown formatting or code block markers.
-            """
-            
+
+            model = _get_model()
+
+            # Create the prompt: static rubric first (cacheable prefix),
+            # dynamic content last. When the rubric is provider-side cached
+            # content it is already part of the model and is not sent again.
+            prompt_parts = [] if _rubric_cached else [DECISION_RUBRIC, ""]
+            prompt = "\n".join(prompt_parts + [
+                "Previous actions taken:",
+                history_str,
+                "",
+                "Current state of the app:",
+                self.current_state,
+                "",
+                f"Current goal: {goal}",
+                "",
+                "Available UI elements:",
+                elements_description,
+            ])
+
+            # Exact-prompt cache: an identical prompt returns the stored
+            # response without paying the model call or rate-limit wait
+            prompt_key = LLMCache.cache_key(prompt)
+            cached_response = llm_cache.get(prompt_key)
+            prompt_vector = None
+            if cached_response is None:
+                # Near-duplicate prompts (one changed history line) reuse the
+                # cached decision when the embeddings are similar enough
+                prompt_vector, cached_response = semantic_cache.get(prompt)
+            if cached_response is None:
+                # Apply rate limiting
+                self.rate_limiter.wait_if_needed()
+
             # Get response from Gemini with retry logic
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    response = model.generate_content(prompt)
-                    response_text = response.text.strip()
-                    
-                    # Clean up the response by removing markdown code block markers if present
-                    if response_text.startswith('```json'):
-                        response_text = response_text[7:]  # Remove ```json
-                    if response_text.startswith('```'):
-                        response_text = response_text[3:]  # Remove ```
-                    if response_text.endswith('```'):
-                        response_text = response_text[:-3]  # Remove ```
-                    
-                    response_text = response_text.strip()
-                    print(f"\nAI response: {response_text}")
-                    
-                    # Parse the JSON response
-                    action_data = json.loads(response_text)
-                    
-                    # Update state based on the AI's prediction
-                    self.current_state = action_data.get('state_update', self.current_state)
-                    
-                    # Convert the actions to the appropriate format
-                    actions = []
-                    for action in action_data['actions']:
-                        # Convert the 'by' string to the appropriate AppiumBy value
-                        by_map = {
-                            'accessibility_id': AppiumBy.ACCESSIBILITY_ID,
-                            'xpath': AppiumBy.XPATH,
-                            'id': AppiumBy.ID,
-                            'class_name': AppiumBy.CLASS_NAME,
-                            'description': AppiumBy.ACCESSIBILITY_ID  # Map 'description' to accessibility_id
-                        }
-                        
-                        by_value = by_map.get(action['by'].lower())
-                        if not by_value:
-                            print(f"Warning: Unknown 'by' value: {action['by']}")
-                            continue
-                        
-                        # Add the action to memory
-                        action_desc = f"Action: {action['action_type']} on {action['value']}"
-                        if action.get('input'):
-                            action_desc += f" with input '{action['input']}'"
-                        self.memory.append(action_desc)
-                        
-                        # Add the action to the list
-                        actions.append((
-                            action['action_type'],
-                            by_value,
-                            action['value'],
-                            action.get('input', None)
-                        ))
-                    
-                    print(f"AI Decision: {action_data['reasoning']}")
-                    print(f"Confidence: {action_data['confidence']}")
-                    print(f"New state: {self.current_state}")
-                    
-                    return actions
-                    
+                    if cached_response is not None:
+                        logger.debug("Exact-prompt cache hit; skipping model call")
+                        response_text = cached_response
+                    else:
+                        response = model.generate_content(prompt)
+                        response_text = response.text.strip()
+
+                    # Clean up the response: strip markdown fences with the
+                    # C-implemented removeprefix/removesuffix, which also
+                    # handles whitespace before the fence that the old
+                    # startswith slicing chain missed
+                    response_text = (response_text.strip()
+                                     .removeprefix('```json')
+                                     .removeprefix('```')
+                                     .removesuffix('```')
+                                     .strip())
+                    logger.debug("AI response: %s", response_text)
+
+                    # raw_decode tolerates trailing garbage after the JSON
+                    # object instead of raising, so a chatty model response
+                    # doesn't cost a retry round
+                    decision_data, _ = _JSON_DECODER.raw_decode(response_text)
+                    if cached_response is None:
+                        llm_cache.set(prompt_key, response_text)
+                        semantic_cache.set(prompt_vector, response_text)
+
+                    self._last_decision = (cache_key, decision_data)
+                    return decision_data
+
                 except Exception as e:
                     error_message = str(e)
-                    print(f"Attempt {attempt + 1}/{max_retries} failed: {error_message}")
-                    
+                    logger.warning("Attempt %d/%d failed: %s",
+                                   attempt + 1, max_retries, error_message)
+
                     if "429" in error_message:
                         if self.rate_limiter.handle_rate_limit_error(error_message):
                             continue
-                    
+
                     if attempt == max_retries - 1:  # Last attempt
-                        print("Max retries reached. Falling back to simulated action.")
-                        return choose_next_action_simulated(elements, goal)
+                        logger.error("Max retries reached.")
+                        return None
                     else:
                         time.sleep(2 ** attempt)  # Exponential backoff
-            
+
         except Exception as e:
-            print(f"Error getting AI decision: {e}")
+            logger.error("Error getting AI decision: %s", e)
+            return None
+
+    def warm_decision_cache(self, elements, goal):
+        """
+        Speculatively runs the combined call so a later choose_next_action or
+        verify_goal_achievement on the same screen becomes a memo hit. Unlike
+        the public methods this records nothing in memory or current_state,
+        and it never queues behind the rate limiter: without headroom the
+        warm-up is skipped instead of spending the next real call's slot.
+        """
+        cache_key = (goal, _elements_signature(elements))
+        if (cache_key in self._action_cache
+                or (self._last_decision and self._last_decision[0] == cache_key)):
+            return
+        if not self.rate_limiter.has_headroom():
+            logger.debug("Skipping speculative decision: no rate-limit headroom")
+            return
+        self._decide_and_verify(elements, goal)
+
+    def choose_next_action(self, elements, goal):
+        """
+        Uses Gemini to choose the next action(s) based on available elements and goal.
+        Returns a list of tuples: [(action_type, by, value, input), ...]
+        """
+        logger.debug("--- AI Action Selection ---")
+        logger.debug("Goal: %s", goal)
+        logger.debug("Current state: %s", self.current_state)
+
+        cache_key = (goal, _elements_signature(elements))
+        if cache_key in self._action_cache:
+            logger.debug("Reusing cached action decision for this goal/screen")
+            return self._action_cache[cache_key]
+
+        decision_data = self._decide_and_verify(elements, goal)
+        if decision_data is None:
+            logger.warning("Falling back to simulated action.")
+            return choose_next_action_simulated(elements, goal)
+
+        try:
+            # Update state based on the AI's prediction
+            self.current_state = decision_data.get('state_update', self.current_state)
+
+            # Convert the actions to the appropriate format
+            actions = []
+            for action in decision_data['actions']:
+                # Convert the 'by' string to the appropriate AppiumBy value.
+                # Try the raw string first: the LLM almost always emits
+                # lowercase already, so .lower() is the rare path.
+                by_value = _BY_MAP.get(action['by']) or _BY_MAP.get(action['by'].lower())
+                if not by_value:
+                    logger.warning("Unknown 'by' value: %s", action['by'])
+                    continue
+
+                # Add the action to memory
+                action_desc = f"Action: {action['action_type']} on {action['value']}"
+                if action.get('input'):
+                    action_desc += f" with input '{action['input']}'"
+                # Interned: repeated action phrases share one string object
+                self.memory.append(sys.intern(action_desc))
+
+                # Add the action to the list
+                actions.append((
+                    action['action_type'],
+                    by_value,
+                    action['value'],
+                    action.get('input', None)
+                ))
+
+            logger.debug("AI Decision: %s", decision_data['reasoning'])
+            logger.debug("Confidence: %s", decision_data['confidence'])
+            logger.debug("New state: %s", self.current_state)
+
+            self._action_cache[cache_key] = actions
+            return actions
+
+        except Exception as e:
+            logger.error("Error getting AI decision: %s", e)
             return choose_next_action_simulated(elements, goal)  # Fallback to simulated action
-    
+
     def verify_goal_achievement(self, elements, goal):
         """
         Uses Gemini to verify if a goal has been achieved based on the current UI state.
         Returns a tuple: (achieved, reason)
         """
-        print("\n--- AI Goal Verification ---")
-        print(f"Verifying goal: {goal}")
-        print(f"Current state: {self.current_state}")
-        
-        # Format the elements for the LLM
-        elements_description = format_elements_for_llm(elements)
-        print(f"\nAvailable UI elements:\n{elements_description}")
-        
+        logger.debug("--- AI Goal Verification ---")
+        logger.debug("Verifying goal: %s", goal)
+        logger.debug("Current state: %s", self.current_state)
+
+        cache_key = (goal, _elements_signature(elements))
+        if cache_key in self._verification_cache:
+            logger.debug("Reusing cached verification result for this goal/screen")
+            return self._verification_cache[cache_key]
+
+        decision_data = self._decide_and_verify(elements, goal)
+        if decision_data is None:
+            logger.warning("Assuming goal not achieved.")
+            return False, "Verification failed after max retries"
+
         try:
-            # Apply rate limiting
-            self.rate_limiter.wait_if_needed()
-            
-            # Format history as a string
-            history_str = "\n".join(self.memory) if self.memory else "No previous actions taken."
-            
-            # Create the prompt
-            prompt = f"""
-            You are an AI assistant helping to test an Android app. Your task is to verify if a specific goal has been achieved.
-            
-            Previous actions taken:
-            {history_str}
-            
-            Current state of the app:
-            {self.current_state}
-            
-            Goal to verify: {goal}
-            
-            Available UI elements:
-            {elements_description}
-            
-            Please analyze the available UI elements and determine the status of the goal.
-            
-            For text input goals (like "Enter username standard_user"):
-            1. Look for input fields (EditText elements) that match the field name
-            2. Check if the field's current text matches the expected value
-            3. If the text matches exactly, the goal is ACHIEVED
-            4. If the field exists but has different text, the goal is NOT YET MET
-            5. If the field doesn't exist or is not accessible, the goal is FAILED
-            
-            For button click goals:
-            1. Look for the button in the current UI
-            2. If the button is not visible and we're on the expected next screen, the goal is ACHIEVED
-            3. If the button is still visible and we're on the same screen, the goal is NOT YET MET
-            4. If we're on an unexpected screen, the goal is FAILED
-            
-            For navigation goals:
-            1. Check if we're on the expected screen
-            2. If we're on the target screen with expected elements, the goal is ACHIEVED
-            3. If we're on the current screen but haven't reached the target, the goal is NOT YET MET
-            4. If we're on an unexpected screen, the goal is FAILED
-            
-            Your response should be a JSON object with the following structure:
-            {{
-                "status": "ACHIEVED|FAILED|NOT_YET_MET",  // The current status of the goal
-                "reason": "explanation of the current status",
-                "confidence": 0.95,  // Confidence score between 0 and 1
-                "next_action_needed": true/false,  // Whether another action is needed
-                "details": "additional details about the verification process"
-            }}
-            
-            Only respond with the JSON object, nothing else.
-            """
-            
-            # Get response from Gemini with retry logic
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = model.generate_content(prompt)
-                    response_text = response.text.strip()
-                    
-                    # Clean up the response by removing markdown code block markers if present
-                    if response_text.startswith('```json'):
-                        response_text = response_text[7:]  # Remove ```json
-                    if response_text.startswith('```'):
-                        response_text = response_text[3:]  # Remove ```
-                    if response_text.endswith('```'):
-                        response_text = response_text[:-3]  # Remove ```
-                    
-                    response_text = response_text.strip()
-                    print(f"\nAI response: {response_text}")
-                    
-                    # Parse the JSON response
-                    verification_data = json.loads(response_text)
-                    
-                    print(f"Verification Result: {verification_data['reason']}")
-                    print(f"Confidence: {verification_data['confidence']}")
-                    print(f"Details: {verification_data['details']}")
-                    
-                    return (
-                        verification_data['status'] == "ACHIEVED",
-                        verification_data['reason']
-                    )
-                    
-                except Exception as e:
-                    error_message = str(e)
-                    print(f"Attempt {attempt + 1}/{max_retries} failed: {error_message}")
-                    
-                    if "429" in error_message:
-                        if self.rate_limiter.handle_rate_limit_error(error_message):
-                            continue
-                    
-                    if attempt == max_retries - 1:  # Last attempt
-                        print("Max retries reached. Assuming goal not achieved.")
-                        return False, "Verification failed after max retries"
-                    else:
-                        time.sleep(2 ** attempt)  # Exponential backoff
-            
+            verification_data = decision_data['verification']
+            logger.debug("Verification Result: %s", verification_data['reason'])
+            logger.debug("Confidence: %s", verification_data['confidence'])
+            logger.debug("Details: %s", verification_data['details'])
+
+            result = (
+                verification_data['status'] == "ACHIEVED",
+                verification_data['reason']
+            )
+            self._verification_cache[cache_key] = result
+            return result
+
         except Exception as e:
-            print(f"Error verifying goal achievement: {e}")
+            logger.error("Error verifying goal achievement: %s", e)
             return False, f"Error during verification: {str(e)}"
 
 # Keep the simulated version for testing/fallback
+_SIMULATED_KEYWORDS = ('Alarm', 'Clock', 'Timer', 'Stopwatch')
+
 def choose_next_action_simulated(elements, goal):
     """
     Simulates an AI agent choosing the next action based on available elements and goal.
     This is a simplified version for testing purposes.
     """
-    print("\n--- AI Simulation ---")
-    print(f"Goal: {goal}")
-    
-    # Extract text and content descriptions from elements
+    logger.debug("--- AI Simulation ---")
+    logger.debug("Goal: %s", goal)
+
+    # The old branch-per-keyword chain rescanned the element list for each
+    # keyword; resolve the goal to a single target first, then walk the
+    # elements exactly once
+    target = next((k for k in _SIMULATED_KEYWORDS if k in goal), None)
+
     available_elements = []
+    match = None
     for elem in elements:
-        text = elem.get('text', '')
-        content_desc = elem.get('content-desc', '')
+        text = elem.get('text') or ''
+        content_desc = elem.get('content-desc') or ''
         if text:
             available_elements.append(text)
         if content_desc:
             available_elements.append(content_desc)
-    
-    print(f"Available elements: {available_elements}")
-    
-    # Simple goal matching
-    if "Alarm" in goal:
-        # Look for Alarm tab or button
-        for elem in elements:
-            text = elem.get('text', '')
-            content_desc = elem.get('content-desc', '')
-            if (text and text == 'Alarm') or (content_desc and content_desc == 'Alarm') or \
-               (text and 'Alarm' in text) or (content_desc and 'Alarm' in content_desc):
-                return ('click', AppiumBy.ACCESSIBILITY_ID, 'Alarm')
-    elif "Clock" in goal:
-        # Look for Clock tab or button
-        for elem in elements:
-            text = elem.get('text', '')
-            content_desc = elem.get('content-desc', '')
-            if (text and text == 'Clock') or (content_desc and content_desc == 'Clock') or \
-               (text and 'Clock' in text) or (content_desc and 'Clock' in content_desc):
-                return ('click', AppiumBy.ACCESSIBILITY_ID, 'Clock')
-    elif "Timer" in goal:
-        # Look for Timer tab or button
-        for elem in elements:
-            text = elem.get('text', '')
-            content_desc = elem.get('content-desc', '')
-            if (text and text == 'Timer') or (content_desc and content_desc == 'Timer') or \
-               (text and 'Timer' in text) or (content_desc and 'Timer' in content_desc):
-                return ('click', AppiumBy.ACCESSIBILITY_ID, 'Timer')
-    elif "Stopwatch" in goal:
-        # Look for Stopwatch tab or button
-        for elem in elements:
-            text = elem.get('text', '')
-            content_desc = elem.get('content-desc', '')
-            if (text and text == 'Stopwatch') or (content_desc and content_desc == 'Stopwatch') or \
-               (text and 'Stopwatch' in text) or (content_desc and 'Stopwatch' in content_desc):
-                return ('click', AppiumBy.ACCESSIBILITY_ID, 'Stopwatch')
-    
-    print("AI Decision: Goal not understood in this simple simulation.")
+        if target and match is None and (target in text or target in content_desc):
+            match = ('click', AppiumBy.ACCESSIBILITY_ID, target)
+
+    logger.debug("Available elements: %s", available_elements)
+
+    if match:
+        return match
+
+    logger.debug("AI Decision: Goal not understood in this simple simulation.")
     return None
 
 # --- /AI Simulation --- 
\ No newline at end of file